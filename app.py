@@ -1,23 +1,71 @@
+from startup_timing import startup_timer
 import sys
 import os
-import requests
+import argparse
 import json
 import copy
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QFrame, QMainWindow,
     QSystemTrayIcon, QMenu, QDialog, QCheckBox, QSpinBox, QStyle, QSizePolicy,
-    QSlider, QGridLayout, QGroupBox, QStyleOptionSizeGrip
+    QSlider, QGridLayout, QGroupBox, QStyleOptionSizeGrip, QLineEdit
 )
 from PyQt6.QtGui import QIcon, QPixmap, QAction, QCursor, QPainter, QColor
 from PyQt6.QtCore import (
     Qt, QPropertyAnimation, QEasingCurve,
     pyqtSignal, QTimer, QThread, QObject, pyqtSlot, QSize, QPoint
 )
-from ping3 import ping
-from ping3.errors import PingError
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
+from game_summary import GameSummary
+from circuit_breaker import HostGuard, Deadline
+from server_stats import StatsStore, WEEKDAY_NAMES
+
+# Тайм-аут одного HTTP-запроса, в секундах.
+REQUEST_TIMEOUT = 5.0
+# Общий бюджет времени на один раунд получения данных серверов, в секундах.
+REFRESH_DEADLINE = 8.0
+# Общий бюджет времени на список игр и иконки игр при загрузке данных, в секундах.
+STARTUP_DEADLINE = 8.0
+# Тайм-аут загрузки одной иконки игры или карты, в секундах.
+ICON_TIMEOUT = 2.0
+
+# requests, ping3, matplotlib, asyncio-движок опроса и клиент потока
+# импортируются при первом использовании, чтобы не замедлять запуск.
+
+def requests_get(url, **kwargs):
+    """Выполняет HTTP GET-запрос через requests."""
+    import requests
+    return requests.get(url, **kwargs)
+
+
+def ping3_ping(address, **kwargs):
+    """Выполняет ping-запрос через ping3."""
+    from ping3 import ping
+    return ping(address, **kwargs)
+
+
+# Сетевые функции приложения; транспорт HostGuard подменяется в режимах записи
+# и воспроизведения трафика.
+host_guard = HostGuard(requests_get, request_timeout=REQUEST_TIMEOUT)
+http_get = host_guard.get
+ping_host = ping3_ping
+# Функция прямого опроса серверов; None — опрос через QueryEngine окна.
+query_servers = None
+# Множитель скорости обновления (ускоренное воспроизведение трассы).
+time_scale = 1.0
+# Выводить отчет о фазах запуска при первой отрисовке.
+startup_report = False
+# Максимальное число одновременных запросов к агрегатору.
+MAX_CONCURRENT_REQUESTS = 8
+# Пауза перед повторным подключением к потоку обновлений, в миллисекундах.
+STREAM_RETRY_INTERVAL = 60000
+# Период сохранения статистики серверов, в миллисекундах.
+STATS_SAVE_INTERVAL = 300000
+# Минимальный интервал между обновлениями предпросмотра при перетаскивании ползунка, в миллисекундах.
+PREVIEW_THROTTLE_INTERVAL = 30
+# Максимальная случайная задержка перед захватом роли источника после его завершения, в миллисекундах.
+TAKEOVER_JITTER = 1500
 
 class PingWorker(QObject):
     """Рабочий поток для выполнения ping-запросов."""
@@ -34,8 +82,9 @@ class PingWorker(QObject):
 
     def run(self):
         """Запускает ping-запрос к заданному адресу и передает результат."""
+        from ping3.errors import PingError
         try:
-            response = ping(self.address, timeout=2)
+            response = ping_host(self.address, timeout=2)
             if response:
                 self.ping_result.emit(int(response * 1000))
             else:
@@ -43,20 +92,94 @@ class PingWorker(QObject):
         except PingError:
             self.ping_failed.emit()
 
+class HeatmapWidget(QWidget):
+    """Тепловая карта заполненности сервера по часам недели."""
+    CELL_SIZE = 4
+
+    def __init__(self, parent=None):
+        """Инициализирует тепловую карту.
+
+        :param parent: Родительский виджет.
+        """
+        super().__init__(parent)
+        self.values = []
+        self.setFixedSize(24 * self.CELL_SIZE, 7 * self.CELL_SIZE)
+        self.setToolTip("Средний онлайн по часам недели (строки — Пн..Вс, столбцы — часы)")
+
+    def set_values(self, values):
+        """Задает значения ячеек и перерисовывает карту.
+
+        :param values: Список из 168 средних значений (None — нет данных).
+        """
+        self.values = values
+        self.update()
+
+    def paintEvent(self, event):
+        """Рисует ячейки тепловой карты."""
+        painter = QPainter(self)
+        painter.setPen(Qt.PenStyle.NoPen)
+        peak = max((value for value in self.values if value), default=0)
+        for cell, value in enumerate(self.values):
+            day, hour = divmod(cell, 24)
+            if value is None:
+                color = QColor(80, 80, 80, 60)
+            else:
+                color = QColor(0, 200, 0, 40 + int(215 * value / peak) if peak else 40)
+            painter.setBrush(color)
+            painter.drawRect(hour * self.CELL_SIZE, day * self.CELL_SIZE, self.CELL_SIZE - 1, self.CELL_SIZE - 1)
+        painter.end()
+
+class StatusIndicator(QWidget):
+    """Круглый индикатор доступности сервера, рисуемый в paintEvent."""
+
+    def __init__(self, parent=None):
+        """Инициализирует индикатор серого цвета.
+
+        :param parent: Родительский виджет.
+        """
+        super().__init__(parent)
+        self.color = QColor('grey')
+        self.setFixedSize(16, 16)
+
+    def set_color(self, color):
+        """Задает цвет индикатора; перерисовка выполняется только при изменении.
+
+        :param color: Имя цвета.
+        """
+        color = QColor(color)
+        if color == self.color:
+            return
+        self.color = color
+        self.update()
+
+    def paintEvent(self, event):
+        """Рисует круг текущего цвета."""
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.color)
+        painter.drawEllipse(self.rect())
+        painter.end()
+
 class AccordionWidget(QFrame):
     """Виджет-аккордеон для отображения информации о сервере игры."""
     toggled = pyqtSignal(object)
+    ping_changed = pyqtSignal(object)
 
-    def __init__(self, game_key, server_info, icon_path, parent=None):
+    def __init__(self, game_key, server_info, icon_path, address=None, remote=False, parent=None):
         """Инициализирует AccordionWidget с ключом игры, информацией о сервере и путем к иконке.
 
         :param game_key: Ключ игры.
         :param server_info: Информация о сервере.
         :param icon_path: Путь к иконке игры.
+        :param address: Адрес сервера в формате ip:port.
+        :param remote: Данные и пинг приходят от другого экземпляра монитора; сам виджет в сеть не обращается.
         :param parent: Родительский виджет.
         """
         super().__init__(parent)
         self.game_key = game_key
+        self.address = address
+        self.remote = remote
         self.server_info = server_info
         self.icon_path = icon_path
         self.setStyleSheet("""QFrame { background-color: transparent; margin: 0px; }""")
@@ -125,23 +248,33 @@ class AccordionWidget(QFrame):
         self.header_layout.addWidget(self.ping_label, alignment=Qt.AlignmentFlag.AlignRight)
 
         # Индикатор доступности (круг)
-        self.status_indicator = QLabel()
-        self.status_indicator.setFixedSize(16, 16)
-        self.status_indicator.setStyleSheet("border-radius: 8px; background-color: grey;")
+        self.status_indicator = StatusIndicator()
         self.header_layout.addWidget(self.status_indicator, alignment=Qt.AlignmentFlag.AlignRight)
 
         self.header_button.setLayout(self.header_layout)
 
+        # Область контента создается при первом разворачивании
+        self.content_area = None
+        self.stats = None
+        self.main_layout.addStretch()
+
+        self.update_ping()
+
+    def ensure_content(self):
+        """Создает область контента (иконка карты, график, статистика), если она еще не создана."""
+        if self.content_area is not None:
+            return
+
         # Область контента (иконка карты и график)
         self.content_area = QWidget()
+        self.content_area.setObjectName("serverContent")
         self.content_area.setMaximumHeight(0)
         self.content_area.setVisible(False)
         self.content_layout = QHBoxLayout()
         self.content_layout.setContentsMargins(10, 0, 10, 10)
         self.content_layout.setSpacing(10)
         self.content_area.setLayout(self.content_layout)
-        self.main_layout.addWidget(self.content_area)
-        self.main_layout.addStretch()
+        self.main_layout.insertWidget(1, self.content_area)
 
         # Иконка карты в области контента
         self.map_icon_label = QLabel()
@@ -153,26 +286,39 @@ class AccordionWidget(QFrame):
         self.create_graph()
         self.content_layout.addWidget(self.canvas)
 
+        # Статистика и тепловая карта по часам недели
+        stats_layout = QVBoxLayout()
+        stats_layout.setSpacing(2)
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("color: #cccccc; font-size: 11px;")
+        stats_layout.addWidget(self.stats_label)
+        self.heatmap_widget = HeatmapWidget()
+        stats_layout.addWidget(self.heatmap_widget)
+        self.content_layout.addLayout(stats_layout)
+        if self.stats is not None:
+            self.update_stats(self.stats)
+
         self.animation = QPropertyAnimation(self.content_area, b"maximumHeight")
         self.animation.setDuration(300)
         self.animation.setEasingCurve(QEasingCurve.Type.InOutQuart)
-
-        self.update_ping()
+        self.animation.finished.connect(self.adjust_parent_size)
 
     def toggle(self):
         """Переключает видимость области контента."""
         if self.header_button.isChecked():
+            self.ensure_content()
             self.content_area.setVisible(True)
             self.animation.setStartValue(0)
             self.animation.setEndValue(self.content_area.sizeHint().height())
             self.header_button.setStyleSheet(self.expanded_button_style())
             self.toggled.emit(self)
         else:
+            self.header_button.setStyleSheet(self.button_style())
+            if self.content_area is None:
+                return
             self.animation.setStartValue(self.content_area.maximumHeight())
             self.animation.setEndValue(0)
-            self.header_button.setStyleSheet(self.button_style())
         self.animation.start()
-        self.animation.finished.connect(self.adjust_parent_size)
 
     def adjust_parent_size(self):
         """Корректирует размер родительского окна."""
@@ -182,7 +328,9 @@ class AccordionWidget(QFrame):
 
     def create_graph(self):
         """Создает график для отображения данных о игроках."""
-        self.figure = plt.Figure(figsize=(2, 2), dpi=100)
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        self.figure = Figure(figsize=(2, 2), dpi=100)
         self.figure.patch.set_alpha(0)
         self.canvas = FigureCanvas(self.figure)
         self.canvas.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
@@ -192,6 +340,9 @@ class AccordionWidget(QFrame):
 
     def update_graph(self):
         """Обновляет график с данными о количестве игроков."""
+        if self.content_area is None:
+            return
+        from matplotlib.ticker import MaxNLocator
         self.figure.clear()
         players_detailed = self.server_info.get('players_detailed', {})
         if not players_detailed:
@@ -213,14 +364,39 @@ class AccordionWidget(QFrame):
         ax.tick_params(axis='x', colors='white', labelsize=6)
         ax.tick_params(axis='y', colors='white', labelsize=6)
         ax.set_title('Онлайн', color='white', fontsize=8)
-        ax.xaxis.set_major_locator(plt.MaxNLocator(3))
-        ax.yaxis.set_major_locator(plt.MaxNLocator(3))
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        ax.xaxis.set_major_locator(MaxNLocator(3))
+        ax.yaxis.set_major_locator(MaxNLocator(3))
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment('right')
 
         self.canvas.draw()
 
+    def update_stats(self, stats):
+        """Обновляет блок статистики сервера.
+
+        :param stats: Объект ServerStats.
+        """
+        self.stats = stats
+        if self.content_area is None:
+            return
+        lines = []
+        if stats.rolling_average is not None:
+            lines.append(f"Средний онлайн: {stats.rolling_average:.1f}")
+        if stats.today_peak() is not None:
+            lines.append(f"Пик сегодня: {stats.today_peak()}")
+        if stats.uptime is not None:
+            lines.append(f"Доступность: {stats.uptime * 100:.0f}%")
+        busiest = stats.busiest_hour()
+        if busiest is not None:
+            lines.append(f"Обычно многолюдно: {WEEKDAY_NAMES[busiest[0]]} {busiest[1]:02d}:00")
+        self.stats_label.setText("\n".join(lines))
+        self.heatmap_widget.set_values(stats.heatmap())
+
     def update_ping(self):
         """Обновляет информацию о пинге для сервера."""
+        if self.remote:
+            return
         address = self.server_info.get('address')
         if address:
             self.ping_thread = QThread()
@@ -237,7 +413,17 @@ class AccordionWidget(QFrame):
             self.ping_thread.start()
         else:
             self.ping_label.setText("-- ms")
-            self.status_indicator.setStyleSheet("border-radius: 8px; background-color: grey;")
+            self.status_indicator.set_color('grey')
+
+    def set_ping(self, ping_ms):
+        """Применяет результат ping-запроса, полученный от другого экземпляра.
+
+        :param ping_ms: Пинг в миллисекундах или None, если сервер недоступен.
+        """
+        if ping_ms is None:
+            self.on_ping_failed()
+        else:
+            self.on_ping_result(ping_ms)
 
     @pyqtSlot(int)
     def on_ping_result(self, ping_ms):
@@ -246,24 +432,28 @@ class AccordionWidget(QFrame):
         :param ping_ms: Время пинга в миллисекундах.
         """
         self.ping_label.setText(f"{ping_ms} ms")
-        self.status_indicator.setStyleSheet("border-radius: 8px; background-color: green;")
+        self.status_indicator.set_color('green')
+        self.ping_changed.emit(ping_ms)
 
     @pyqtSlot()
     def on_ping_failed(self):
         """Обрабатывает неудачный результат ping-запроса."""
         self.ping_label.setText("Недоступен")
-        self.status_indicator.setStyleSheet("border-radius: 8px; background-color: red;")
+        self.status_indicator.set_color('red')
+        self.ping_changed.emit(None)
 
     def load_map_icon(self):
         """Загружает иконку карты из файла или из URL, если файл отсутствует."""
+        if self.content_area is None:
+            return
         game_name = self.game_key
         current_map = self.server_info.get('current_map', '').replace(' ', '%20')
         map_icon_filename = f"map_icons/{game_name}_{current_map}.jpg"
         
-        if not os.path.exists(map_icon_filename):
+        if current_map and not os.path.exists(map_icon_filename) and not self.remote:
             try:
                 icon_url = f"https://gamestates.ru/img/{game_name}/sq/{current_map}.jpg"
-                icon_response = requests.get(icon_url)
+                icon_response = http_get(icon_url, timeout=ICON_TIMEOUT)
                 
                 # Проверяем, является ли содержимое изображением
                 if "image" in icon_response.headers.get("Content-Type", ""):
@@ -337,6 +527,13 @@ class SettingsWindow(QDialog):
         self.settings = settings
         self.original_settings = copy.deepcopy(settings)
         self.setModal(True)  # Сделать окно настроек модальным
+
+        # Предпросмотр при перетаскивании ползунка применяется не чаще раза в PREVIEW_THROTTLE_INTERVAL;
+        # по срабатыванию таймера применяется последнее значение
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_THROTTLE_INTERVAL)
+        self.preview_timer.timeout.connect(lambda: self.settings_updated.emit(self.settings))
         self.init_ui()
 
     def init_ui(self):
@@ -362,19 +559,24 @@ class SettingsWindow(QDialog):
             spinbox.setMaximum(3600)
             spinbox.setValue(self.settings.get(game_key, {}).get('interval', 60))
 
+            servers_edit = QLineEdit(", ".join(self.settings.get(game_key, {}).get('servers', [])))
+            servers_edit.setPlaceholderText("Доп. серверы: ip:port[:порт запросов], ...")
+
             games_layout.addWidget(checkbox, row, col)
             games_layout.addWidget(QLabel("Интервал (сек):"), row, col + 1)
             games_layout.addWidget(spinbox, row, col + 2)
+            games_layout.addWidget(servers_edit, row, col + 3)
 
             self.game_settings[game_key] = {
                 'enabled': checkbox,
-                'interval': spinbox
+                'interval': spinbox,
+                'servers': servers_edit
             }
 
             row += 1
             if row > 5:
                 row = 0
-                col += 3
+                col += 4
 
         # Настройки прозрачности
         transparency_group = QGroupBox("Прозрачность")
@@ -407,9 +609,23 @@ class SettingsWindow(QDialog):
         size_layout.addWidget(QLabel("Ширина окна (пиксели):"))
         size_layout.addWidget(self.window_width_spinbox)
 
+        # Настройки опроса серверов
+        network_group = QGroupBox("Опрос серверов")
+        network_layout = QHBoxLayout()
+        network_group.setLayout(network_layout)
+
+        self.direct_query_checkbox = QCheckBox("Опрашивать серверы напрямую (без агрегатора)")
+        self.direct_query_checkbox.setChecked(self.settings.get('direct_query', False))
+        network_layout.addWidget(self.direct_query_checkbox)
+
+        self.stream_url_edit = QLineEdit(self.settings.get('stream_url', ''))
+        self.stream_url_edit.setPlaceholderText("Поток обновлений (SSE), например http://127.0.0.1:8765/stream")
+        network_layout.addWidget(self.stream_url_edit)
+
         layout.addWidget(games_group, 0, 0, 1, 3)
         layout.addWidget(transparency_group, 1, 0, 1, 3)
         layout.addWidget(size_group, 2, 0, 1, 3)
+        layout.addWidget(network_group, 3, 0, 1, 3)
 
         button_layout = QHBoxLayout()
         save_button = QPushButton("Сохранить")
@@ -418,7 +634,7 @@ class SettingsWindow(QDialog):
         cancel_button.clicked.connect(self.reject)
         button_layout.addWidget(save_button)
         button_layout.addWidget(cancel_button)
-        layout.addLayout(button_layout, 3, 1)
+        layout.addLayout(button_layout, 4, 1)
 
     def update_transparency(self, value):
         """Обновляет уровень прозрачности основного окна.
@@ -427,7 +643,7 @@ class SettingsWindow(QDialog):
         """
         self.main_window_transparency_label.setText(str(value))
         self.settings['main_window_transparency'] = value
-        self.settings_updated.emit(self.settings)
+        self.schedule_preview()
 
     def update_window_size(self, value):
         """Обновляет ширину окна.
@@ -435,15 +651,26 @@ class SettingsWindow(QDialog):
         :param value: Ширина окна в пикселях.
         """
         self.settings['window_width'] = value
-        self.settings_updated.emit(self.settings)
+        self.schedule_preview()
+
+    def schedule_preview(self):
+        """Планирует обновление предпросмотра, если оно еще не запланировано.
+
+        Таймер не перезапускается, поэтому при непрерывном перетаскивании
+        предпросмотр обновляется с постоянной частотой.
+        """
+        if not self.preview_timer.isActive():
+            self.preview_timer.start()
 
     def save_settings(self):
         """Сохраняет текущие настройки и закрывает окно."""
+        self.preview_timer.stop()
         self.settings_changed.emit()
         self.close()
 
     def reject(self):
         """Отменяет изменения и восстанавливает оригинальные настройки."""
+        self.preview_timer.stop()
         self.settings = copy.deepcopy(self.original_settings)
         self.settings_reverted.emit()
         super().reject()
@@ -457,10 +684,13 @@ class SettingsWindow(QDialog):
         for game_key, widgets in self.game_settings.items():
             settings[game_key] = {
                 'enabled': widgets['enabled'].isChecked(),
-                'interval': widgets['interval'].value()
+                'interval': widgets['interval'].value(),
+                'servers': [server.strip() for server in widgets['servers'].text().split(',') if server.strip()]
             }
         settings['main_window_transparency'] = self.main_window_transparency.value()
         settings['window_width'] = self.window_width_spinbox.value()
+        settings['direct_query'] = self.direct_query_checkbox.isChecked()
+        settings['stream_url'] = self.stream_url_edit.text().strip()
         return settings
 
 class ResizeGrip(QWidget):
@@ -497,9 +727,14 @@ class ResizeGrip(QWidget):
 
 class MainWindow(QMainWindow):
     """Главное окно приложения."""
-    def __init__(self):
-        """Инициализирует главное окно приложения."""
+    def __init__(self, single_instance=True, streaming=True):
+        """Инициализирует главное окно приложения.
+
+        :param single_instance: Подключаться к уже запущенному экземпляру вместо самостоятельного опроса.
+        :param streaming: Использовать поток обновлений, если он задан в настройках.
+        """
         super().__init__()
+        self.streaming = streaming
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.Window)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.setStyleSheet("""QMainWindow { background-color: transparent; }""")
@@ -511,37 +746,79 @@ class MainWindow(QMainWindow):
 
         ideal_width = int(screen_width / 5)
 
-        if os.path.exists("settings.json"):
-            try:
-                with open("settings.json", "r", encoding='utf-8') as f:
-                    self.settings = json.load(f)
-            except Exception as e:
-                print(f"Ошибка при загрузке настроек: {e}")
-                self.settings = {}
-        else:
-            self.settings = {}
+        self.settings = self.read_settings()
+        startup_timer.mark("settings")
 
         self.resize(self.settings.get('window_width', ideal_width), 600)
         self.setMinimumWidth(ideal_width)
         self.resizing = False
         self.moving = False
+        self.query_engine = None
+        self.executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
+        self.stats_store = StatsStore()
+        self.stats_store.load()
+        self.daemon = None
+        self.daemon_client = None
+        if single_instance:
+            self.init_single_instance()
         self.init_ui()
-        self.load_data()
+        startup_timer.mark("ui")
         self.create_tray_icon()
+        startup_timer.mark("tray")
         self.show()
         self.adjustSize()
+        # Данные загружаются после первой отрисовки окна
+        QTimer.singleShot(0, self.load_data)
+
+    @staticmethod
+    def read_settings():
+        """Читает настройки из файла settings.json.
+
+        :return: Словарь настроек (пустой, если файл отсутствует или поврежден).
+        """
+        if os.path.exists("settings.json"):
+            try:
+                with open("settings.json", "r", encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Ошибка при загрузке настроек: {e}")
+        return {}
+
+    def init_single_instance(self):
+        """Подключается к работающему экземпляру монитора или становится им.
+
+        Первый экземпляр опрашивает серверы и рассылает данные по локальному
+        сокету; последующие получают от него снимки и сами в сеть не обращаются.
+        """
+        from monitor_daemon import MonitorDaemon, DaemonClient
+        self.daemon_client = DaemonClient.connect_to_running(self)
+        if self.daemon_client is None:
+            daemon = MonitorDaemon(self)
+            if daemon.start():
+                self.daemon = daemon
+                self.daemon.command_received.connect(self.on_daemon_command)
+                return
+            daemon.deleteLater()
+            # Сокет мог занять другой экземпляр, запущенный одновременно с этим
+            self.daemon_client = DaemonClient.connect_to_running(self)
+        if self.daemon_client is not None:
+            self.daemon_client.message_received.connect(self.on_daemon_message)
+            self.daemon_client.disconnected.connect(self.on_daemon_disconnected)
 
     def init_ui(self):
         """Инициализирует пользовательский интерфейс главного окна."""
+        # Фон окна рисуется в paintEvent по кэшированному цвету; таблица стилей задает только слои дочерних областей
         self.central_widget = QWidget()
-        self.central_widget.setStyleSheet("background-color: rgba(30, 30, 30, 128); border-radius: 10px;")
         self.setCentralWidget(self.central_widget)
+        self.background_color = None
+        self.apply_transparency_settings()
 
         self.layout = QVBoxLayout(self.central_widget)
         self.layout.setContentsMargins(10, 10, 10, 10)
         self.layout.setSpacing(0)
 
         self.content_widget = QWidget()
+        self.content_widget.setObjectName("content")
         self.content_layout = QVBoxLayout(self.content_widget)
         self.content_layout.setContentsMargins(0, 0, 0, 0)
         self.content_layout.setSpacing(5)
@@ -549,6 +826,7 @@ class MainWindow(QMainWindow):
 
         # Добавляем кнопку "Добавить игры"
         self.add_games_button = QPushButton("Добавить игры")
+        self.add_games_button.setObjectName("addGames")
         self.add_games_button.clicked.connect(self.open_settings)
         self.layout.addWidget(self.add_games_button, alignment=Qt.AlignmentFlag.AlignCenter)
         self.add_games_button.hide()  # Изначально скрываем кнопку
@@ -559,6 +837,26 @@ class MainWindow(QMainWindow):
         # self.layout.addWidget(self.resize_grip, alignment=Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignRight)
 
         self.update_timers = {}
+        self.sample_timers = {}
+        self.server_online = {}
+        self.game_widgets = {}
+        self.game_list = []
+        self.aggregator_addresses = {}
+        self.query_ports = {}
+        self.game_summaries = {}
+        self.summary_labels = {}
+
+        self.stream_thread = None
+        self.stream_worker = None
+        self.stream_retry_timer = QTimer(self)
+        self.stream_retry_timer.setSingleShot(True)
+        self.stream_retry_timer.timeout.connect(self.start_stream)
+
+        # Статистику сохраняет только экземпляр, который сам опрашивает серверы
+        self.stats_save_timer = QTimer(self)
+        self.stats_save_timer.timeout.connect(self.stats_store.save)
+        if self.daemon_client is None:
+            self.stats_save_timer.start(STATS_SAVE_INTERVAL)
 
     def mousePressEvent(self, event):
         """Обрабатывает нажатие мыши на окне."""
@@ -580,11 +878,13 @@ class MainWindow(QMainWindow):
 
     def paintEvent(self, event):
         """Рисует главное окно с заданной прозрачностью."""
+        if not startup_timer.reported:
+            startup_timer.mark("first_paint")
+            startup_timer.report(verbose=startup_report)
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         rect = self.rect()
-        transparency = self.settings.get('main_window_transparency', 128)
-        painter.setBrush(QColor(30, 30, 30, transparency))
+        painter.setBrush(self.background_color)
         painter.setPen(Qt.PenStyle.NoPen)
         painter.drawRoundedRect(rect, 10, 10)
         painter.end()
@@ -595,8 +895,15 @@ class MainWindow(QMainWindow):
             if not os.path.exists(folder):
                 os.makedirs(folder)
 
+        # Зритель получает список серверов от экземпляра-источника
+        if self.daemon_client is not None:
+            self.apply_transparency_settings()
+            return
+
+        # Список игр и иконки загружаются в потоке интерфейса, поэтому их общее время ограничено
+        deadline = Deadline(STARTUP_DEADLINE)
         try:
-            response = requests.get("http://gamestates.ru:8000/")
+            response = http_get("http://gamestates.ru:8000/", deadline=deadline)
             response.raise_for_status()
             games = response.json()
         except Exception as e:
@@ -605,16 +912,11 @@ class MainWindow(QMainWindow):
 
         self.game_widgets = {}
         self.game_list = list(games.keys())
+        self.aggregator_addresses = dict(games)
 
-        if os.path.exists("settings.json"):
-            try:
-                with open("settings.json", "r", encoding='utf-8') as f:
-                    self.settings = json.load(f)
-            except Exception as e:
-                print(f"Ошибка при загрузке настроек: {e}")
-                self.settings = {game_key: {'enabled': False, 'interval': 60} for game_key in self.game_list}
-        else:
-            self.settings = {game_key: {'enabled': False, 'interval': 60} for game_key in self.game_list}
+        # Настройки уже загружены в __init__; добавляем значения по умолчанию для новых игр
+        for game_key in self.game_list:
+            self.settings.setdefault(game_key, {'enabled': False, 'interval': 60})
 
         # Применение настроек прозрачности
         self.apply_transparency_settings()
@@ -626,74 +928,281 @@ class MainWindow(QMainWindow):
             self.add_games_button.show()
             self.content_widget.hide()
             self.adjustSize()
+            self.publish_layout()
             return
         else:
             self.add_games_button.hide()
             self.content_widget.show()
 
-        # Инициализируем счетчик для отслеживания количества развернутых виджетов
-        expanded_count = 0
-        max_expanded = 5
-
+        targets = []
+        self.query_ports = {}
         for game_key, server_address in games.items():
             if not self.settings.get(game_key, {}).get('enabled', False):
                 continue
 
-            ip_port = server_address.split(':')
-            if len(ip_port) != 2:
-                print(f"Неверный формат адреса сервера для {game_key}: {server_address}")
-                continue
-            ip, port = ip_port
+            for address in self.game_servers(game_key, server_address):
+                # Порт запросов указывается третьим, если на хосте несколько серверов
+                # игры с фиксированным портом запросов (bf1942, bf2)
+                parts = address.split(':')
+                if len(parts) not in (2, 3) or (len(parts) == 3 and not parts[2].isdigit()):
+                    print(f"Неверный формат адреса сервера для {game_key}: {address}")
+                    continue
+                target = (game_key, parts[0], parts[1])
+                if target not in targets:
+                    targets.append(target)
+                if len(parts) == 3:
+                    self.query_ports[target] = int(parts[2])
+
+        server_infos = self.fetch_servers(targets)
+        self.build_server_widgets(targets, server_infos, deadline)
 
-            try:
-                server_response = requests.get(f"http://gamestates.ru:8000/{ip}")
-                server_response.raise_for_status()
-                server_info = server_response.json()
-            except Exception as e:
-                print(f"Ошибка при получении данных сервера {game_key}: {e}")
-                continue
+        self.content_layout.addStretch()
+        self.adjustSize()
+        self.publish_layout()
+        self.start_stream()
 
-            icon_filename = f"icons/{game_key}.png"
-            if not os.path.exists(icon_filename):
-                try:
-                    icon_url = f"https://gamestates.ru/img/110x95/{game_key}.png"
-                    icon_response = requests.get(icon_url)
-                    if icon_response.status_code == 200:
-                        with open(icon_filename, 'wb') as icon_file:
-                            icon_file.write(icon_response.content)
-                    else:
-                        print(f"Не удалось скачать иконку для {game_key}: статус {icon_response.status_code}")
-                        icon_filename = "icons/default.png"
-                except Exception as e:
-                    print(f"Ошибка при скачивании иконки для {game_key}: {e}")
-                    icon_filename = "icons/default.png"
+    def build_server_widgets(self, targets, server_infos, deadline=None):
+        """Создает виджеты серверов, сгруппированные по играм.
 
-            if not os.path.exists(icon_filename):
-                icon_filename = "icons/default.png"
+        Серверы без данных показываются недоступными и опрашиваются вместе с
+        остальными до первого успешного ответа.
+
+        :param targets: Список кортежей (game_key, ip, port).
+        :param server_infos: Словарь {(game_key, ip, port): server_info}.
+        :param deadline: Общий срок загрузки иконок игр (Deadline) или None.
+        """
+        remote = self.daemon_client is not None
 
-            server_widget = AccordionWidget(game_key, server_info, icon_filename, parent=self.content_widget)
-            server_widget.toggled.connect(self.accordion_toggled)
-            self.content_layout.addWidget(server_widget)
-            self.game_widgets[game_key] = server_widget
+        # Инициализируем счетчик для отслеживания количества развернутых виджетов
+        expanded_count = 0
+        max_expanded = 5
 
+        for game_key in dict.fromkeys(target[0] for target in targets):
+            game_targets = [target for target in targets if target[0] == game_key]
+
+            icon_filename = self.load_game_icon(game_key, download=not remote, deadline=deadline)
+            self.game_summaries[game_key] = GameSummary()
+
+            # Сводка по группе показывается, если у игры несколько серверов
+            if len(game_targets) > 1:
+                summary_label = QLabel()
+                summary_label.setStyleSheet("color: #cccccc; font-size: 13px; background-color: transparent;")
+                self.content_layout.addWidget(summary_label)
+                self.summary_labels[game_key] = summary_label
+
+            for target in game_targets:
+                _, ip, port = target
+                online = target in server_infos
+                server_info = server_infos[target] if online else {'name': f"{ip}:{port}", 'address': ip}
+                server_widget = AccordionWidget(game_key, server_info, icon_filename, address=f"{ip}:{port}",
+                                                remote=remote, parent=self.content_widget)
+                server_widget.toggled.connect(self.accordion_toggled)
+                server_widget.ping_changed.connect(lambda ping_ms, t=target: self.on_server_ping(t, ping_ms))
+                self.content_layout.addWidget(server_widget)
+                self.game_widgets[target] = server_widget
+                if online:
+                    self.game_summaries[game_key].update_players(target, server_info.get('num_players', 0))
+                self.server_online[target] = online
+                # Снимки добавляет только таймер sample_stats; здесь показывается накопленная статистика
+                server_widget.update_stats(self.stats_store.get(f"{game_key}/{ip}:{port}"))
+
+                # Разворачиваем первые 5 виджетов по умолчанию
+                if expanded_count < max_expanded:
+                    server_widget.header_button.setChecked(True)
+                    expanded_count += 1
+
+            self.update_summary_label(game_key)
+
+            # Статистика пополняется раз в период обновления независимо от транспорта
             interval = self.settings.get(game_key, {}).get('interval', 60) * 1000
+            sample_timer = QTimer(self)
+            sample_timer.timeout.connect(lambda gk=game_key: self.sample_stats(gk))
+            sample_timer.start(max(1, int(interval / time_scale)))
+            self.sample_timers[game_key] = sample_timer
+
+            if remote:
+                continue
             timer = QTimer(self)
-            timer.timeout.connect(lambda gk=game_key, ip=ip: self.update_server_data(gk, ip))
-            timer.start(interval)
+            timer.timeout.connect(lambda gk=game_key: self.update_server_data(gk))
+            timer.start(max(1, int(interval / time_scale)))
             self.update_timers[game_key] = timer
 
-            # Разворачиваем первые 5 виджетов по умолчанию
-            if expanded_count < max_expanded:
-                server_widget.header_button.setChecked(True)
-                expanded_count += 1
+    def game_servers(self, game_key, default_address):
+        """Возвращает список адресов серверов игры.
 
-        self.content_layout.addStretch()
-        self.adjustSize()
+        :param game_key: Ключ игры.
+        :param default_address: Адрес сервера, известный агрегатору.
+        :return: Список адресов в формате ip:port без повторов.
+        """
+        servers = [default_address] + self.settings.get(game_key, {}).get('servers', [])
+        return list(dict.fromkeys(server.strip() for server in servers if server.strip()))
+
+    def load_game_icon(self, game_key, download=True, deadline=None):
+        """Возвращает путь к иконке игры, скачивая ее при необходимости.
+
+        :param game_key: Ключ игры.
+        :param download: Скачивать иконку, если ее нет на диске.
+        :param deadline: Общий срок загрузки (Deadline) или None.
+        :return: Путь к файлу иконки.
+        """
+        icon_filename = f"icons/{game_key}.png"
+        if not os.path.exists(icon_filename) and download:
+            try:
+                icon_url = f"https://gamestates.ru/img/110x95/{game_key}.png"
+                icon_response = http_get(icon_url, deadline=deadline, timeout=ICON_TIMEOUT)
+                if icon_response.status_code == 200:
+                    with open(icon_filename, 'wb') as icon_file:
+                        icon_file.write(icon_response.content)
+                else:
+                    print(f"Не удалось скачать иконку для {game_key}: статус {icon_response.status_code}")
+                    icon_filename = "icons/default.png"
+            except Exception as e:
+                print(f"Ошибка при скачивании иконки для {game_key}: {e}")
+                icon_filename = "icons/default.png"
+
+        if not os.path.exists(icon_filename):
+            icon_filename = "icons/default.png"
+        return icon_filename
+
+    def fetch_aggregator_info(self, ip, deadline=None):
+        """Получает данные сервера от агрегатора.
+
+        :param ip: IP-адрес сервера.
+        :param deadline: Общий срок раунда обновления.
+        :return: Словарь с данными сервера.
+        """
+        # Выключатель ведется для каждой записи агрегатора отдельно
+        server_response = http_get(f"http://gamestates.ru:8000/{ip}", deadline=deadline,
+                                   endpoint=f"gamestates.ru:8000/{ip}")
+        server_response.raise_for_status()
+        return server_response.json()
+
+    def fetch_servers(self, targets, previous=None):
+        """Получает данные нескольких серверов конкурентно.
+
+        Серверы с поддержкой прямого опроса опрашиваются одним пакетом, остальные
+        и не ответившие — через агрегатор в пуле потоков с ограниченным числом
+        одновременных запросов. Весь раунд ограничен бюджетом REFRESH_DEADLINE:
+        запросы, не уложившиеся в него, отменяются.
+
+        :param targets: Список кортежей (game_key, ip, port).
+        :param previous: Словарь предыдущих данных {(game_key, ip, port): server_info}.
+        :return: Словарь {(game_key, ip, port): server_info}; недоступные серверы в нем отсутствуют.
+        """
+        previous = previous or {}
+        results = {}
+        deadline = Deadline(REFRESH_DEADLINE)
+        if self.settings.get('direct_query', False):
+            from udp_query import QueryEngine, merge_server_info
+            query = query_servers
+            if query is None:
+                if self.query_engine is None:
+                    self.query_engine = QueryEngine()
+                query = self.query_engine.query_all
+            direct_results = query(
+                [target for target in targets if QueryEngine.supports(target[0])],
+                budget=deadline.remaining() / 2, query_ports=self.query_ports)
+            for target, direct_result in direct_results.items():
+                if direct_result:
+                    server_info = merge_server_info(previous.get(target), direct_result)
+                    server_info.setdefault('address', target[1])
+                    results[target] = server_info
+
+        # Агрегатор адресуется по IP и возвращает данные одного сервера, поэтому
+        # ответ присваивается только тому серверу, которому он соответствует
+        pending = {}
+        for target in targets:
+            if target not in results:
+                pending.setdefault(target[1], []).append(target)
+        futures = {self.executor.submit(self.fetch_aggregator_info, ip, deadline): ip for ip in pending}
+        try:
+            for future in as_completed(futures, timeout=deadline.remaining()):
+                ip = futures[future]
+                try:
+                    server_info = future.result()
+                except Exception as e:
+                    print(f"Ошибка при получении данных сервера {ip}: {e}")
+                    continue
+                target = self.match_aggregator_target(server_info, pending[ip])
+                if target is not None:
+                    results[target] = server_info
+        except FuturesTimeoutError:
+            for future, ip in futures.items():
+                if not future.done():
+                    future.cancel()
+                    print(f"Превышен бюджет времени при получении данных сервера {ip}")
+        return results
+
+    def match_aggregator_target(self, server_info, candidates):
+        """Определяет, какому серверу соответствует ответ агрегатора.
+
+        Ответ сопоставляется по порту, если агрегатор его сообщает. Без порта
+        ответ принимается, если на этом IP настроен один сервер игры, а из
+        нескольких выбирается тот, под адресом которого агрегатор перечисляет
+        игру. Серверы, которым ответ не соответствует, остаются без данных.
+
+        :param server_info: Ответ агрегатора.
+        :param candidates: Список кортежей (game_key, ip, port) с тем же IP.
+        :return: Кортеж (game_key, ip, port) или None.
+        """
+        port = server_info.get('port')
+        if port is None and ':' in str(server_info.get('address', '')):
+            port = str(server_info['address']).rsplit(':', 1)[1]
+        if port is not None:
+            matches = [target for target in candidates if str(target[2]) == str(port)]
+        else:
+            matches = candidates
+        listed = [target for target in matches
+                  if self.aggregator_addresses.get(target[0]) == f"{target[1]}:{target[2]}"]
+        if listed:
+            return listed[0]
+        if len(matches) == 1:
+            return matches[0]
+        return None
+
+    def on_server_ping(self, target, ping_ms):
+        """Обновляет сводку игры по результату ping-запроса сервера.
+
+        :param target: Ключ сервера (game_key, ip, port).
+        :param ping_ms: Пинг в миллисекундах или None.
+        """
+        summary = self.game_summaries.get(target[0])
+        if summary is not None:
+            summary.update_ping(target, ping_ms)
+            self.update_summary_label(target[0])
+        if self.daemon is not None:
+            self.daemon.publish({'type': 'ping', 'target': list(target), 'ping': ping_ms})
+
+    def update_summary_label(self, game_key):
+        """Обновляет текст сводки по группе серверов игры.
+
+        :param game_key: Ключ игры.
+        """
+        label = self.summary_labels.get(game_key)
+        summary = self.game_summaries.get(game_key)
+        if label is None or summary is None:
+            return
+        best_ping = f"{summary.best_ping} ms" if summary.best_ping is not None else "--"
+        label.setText(f"{game_key}: игроков {summary.total_players}, лучший пинг {best_ping}")
 
     def apply_transparency_settings(self):
-        """Применяет настройки прозрачности к центральному виджету."""
+        """Применяет настройки прозрачности к фону окна.
+
+        Фон окна рисуется в paintEvent и складывается из двух слоев (окно и
+        центральный виджет). Области содержимого, раскрытые строки серверов и
+        кнопка "Добавить игры" рисуют поверх него еще один полупрозрачный слой
+        через таблицу стилей. Стили и фон обновляются только при изменении цвета.
+        """
         transparency = self.settings.get('main_window_transparency', 128)
-        self.central_widget.setStyleSheet(f"background-color: rgba(30, 30, 30, {transparency}); border-radius: 10px;")
+        alpha = 255 - (255 - transparency) ** 2 // 255
+        color = QColor(30, 30, 30, alpha)
+        if color == self.background_color:
+            return
+        self.background_color = color
+        self.central_widget.setStyleSheet(
+            "QWidget#content, QWidget#serverContent, QPushButton#addGames "
+            f"{{ background-color: rgba(30, 30, 30, {transparency}); border-radius: 10px; }}")
+        self.update()
 
     def accordion_toggled(self, toggled_widget):
         """Обрабатывает событие переключения аккордеона.
@@ -706,31 +1215,268 @@ class MainWindow(QMainWindow):
                 widget.toggle()
         self.adjustSize()
 
-    def update_server_data(self, game_key, ip):
-        """Обновляет данные о сервере и обновляет соответствующий виджет.
+    def update_server_data(self, game_key):
+        """Обновляет данные о серверах игры и соответствующие виджеты.
+
+        Все серверы игры опрашиваются конкурентно; при включенном прямом опросе
+        серверы опрашиваются по протоколу игры, при неудаче — через агрегатор.
 
         :param game_key: Ключ игры.
-        :param ip: IP-адрес сервера.
         """
-        try:
-            server_response = requests.get(f"http://gamestates.ru:8000/{ip}")
-            server_response.raise_for_status()
-            server_info = server_response.json()
-        except Exception as e:
-            print(f"Ошибка при обновлении данных сервера {game_key}: {e}")
+        targets = [target for target in self.game_widgets if target[0] == game_key]
+        previous = {target: self.game_widgets[target].server_info for target in targets}
+        server_infos = self.fetch_servers(targets, previous)
+
+        for target, server_info in server_infos.items():
+            self.apply_server_info(target, server_info)
+        for target in targets:
+            if target not in server_infos:
+                self.mark_offline(target)
+        self.update_summary_label(game_key)
+
+    def apply_server_info(self, target, server_info):
+        """Применяет новые данные сервера к его виджету.
+
+        :param target: Ключ сервера (game_key, ip, port).
+        :param server_info: Данные сервера.
+        """
+        widget = self.game_widgets.get(target)
+        if not widget:
+            return
+        widget.server_info = server_info
+        widget.name_label.setText(server_info.get('name', 'Unknown Server'))
+        players = f"{server_info.get('num_players', '0')}/{server_info.get('max_players', '0')}"
+        widget.players_label.setText(f"{players}")
+        map_name = server_info.get('current_map', 'N/A')
+        widget.map_name_label.setText(f"{map_name}")
+        widget.update_graph()
+        widget.update_ping()
+        widget.load_map_icon()
+        summary = self.game_summaries.get(target[0])
+        if summary is not None:
+            summary.update_players(target, server_info.get('num_players', 0))
+        self.server_online[target] = True
+        if self.daemon is not None:
+            self.daemon.publish({'type': 'server', 'target': list(target), 'server_info': server_info})
+
+    def mark_offline(self, target):
+        """Отмечает сервер недоступным до следующего успешного ответа.
+
+        Сервер исключается из сводки группы, а в статистику до восстановления
+        попадают снимки недоступности.
+
+        :param target: Ключ сервера (game_key, ip, port).
+        """
+        if target not in self.game_widgets:
+            return
+        self.server_online[target] = False
+        summary = self.game_summaries.get(target[0])
+        if summary is not None:
+            summary.remove(target)
+        if self.daemon is not None:
+            self.daemon.publish({'type': 'server', 'target': list(target), 'server_info': None})
+
+    def publish_layout(self):
+        """Рассылает зрителям список игр и текущие данные всех серверов."""
+        if self.daemon is None:
             return
+        self.daemon.publish({
+            'type': 'servers',
+            'game_list': self.game_list,
+            'servers': [{'target': list(target),
+                         'server_info': widget.server_info if self.server_online.get(target) else None}
+                        for target, widget in self.game_widgets.items()],
+        })
+
+    @pyqtSlot(dict)
+    def on_daemon_message(self, message):
+        """Применяет снимок, полученный от экземпляра-источника.
+
+        :param message: Словарь сообщения.
+        """
+        if message.get('type') == 'servers':
+            self.clear_server_widgets()
+            self.game_list = message.get('game_list', [])
+            targets = [tuple(server['target']) for server in message.get('servers', [])]
+            server_infos = {tuple(server['target']): server['server_info'] for server in message.get('servers', [])
+                            if server['server_info'] is not None}
+            if targets:
+                self.add_games_button.hide()
+                self.content_widget.show()
+            else:
+                self.add_games_button.show()
+                self.content_widget.hide()
+            self.build_server_widgets(targets, server_infos)
+            self.content_layout.addStretch()
+            self.adjustSize()
+        elif message.get('type') == 'server':
+            target = tuple(message['target'])
+            if message['server_info'] is None:
+                self.mark_offline(target)
+            else:
+                self.apply_server_info(target, message['server_info'])
+            self.update_summary_label(target[0])
+        elif message.get('type') == 'ping':
+            widget = self.game_widgets.get(tuple(message['target']))
+            if widget:
+                widget.set_ping(message['ping'])
+
+    @pyqtSlot()
+    def on_daemon_disconnected(self):
+        """Берет опрос на себя, если экземпляр-источник завершился."""
+        print("Экземпляр-источник данных завершился, переключение на самостоятельный опрос")
+        self.daemon_client = None
+        # Зрители отключаются одновременно; случайная задержка разводит их попытки занять сокет
+        QTimer.singleShot(random.randint(0, TAKEOVER_JITTER), self.take_over)
+
+    def take_over(self):
+        """Подключается к новому источнику данных или становится им."""
+        self.init_single_instance()
+        if self.daemon_client is None:
+            self.stats_store.load()
+            self.stats_save_timer.start(STATS_SAVE_INTERVAL)
+        self.reload_data()
+
+    @pyqtSlot(dict)
+    def on_daemon_command(self, message):
+        """Выполняет команду зрителя.
+
+        :param message: Словарь сообщения.
+        """
+        if message.get('type') == 'reload':
+            self.settings = self.read_settings()
+            self.reload_data()
 
-        widget = self.game_widgets.get(game_key)
+    def sample_stats(self, game_key):
+        """Добавляет в статистику по одному снимку каждого сервера игры.
+
+        Вызывается раз в период обновления, поэтому вес снимков не зависит от
+        транспорта и частоты изменений данных.
+
+        :param game_key: Ключ игры.
+        """
+        for target, widget in list(self.game_widgets.items()):
+            if target[0] == game_key:
+                self.record_stats(target, widget.server_info if self.server_online.get(target) else None)
+
+    def record_stats(self, target, server_info):
+        """Добавляет снимок сервера в статистику и обновляет ее отображение.
+
+        :param target: Ключ сервера (game_key, ip, port).
+        :param server_info: Данные сервера или None, если сервер не ответил.
+        """
+        game_key, ip, port = target
+        stats = self.stats_store.get(f"{game_key}/{ip}:{port}")
+        if server_info is None:
+            stats.add_sample(0, online=False)
+        else:
+            stats.add_sample(server_info.get('num_players', 0))
+        widget = self.game_widgets.get(target)
         if widget:
-            widget.server_info = server_info
-            widget.name_label.setText(server_info.get('name', 'Unknown Server'))
-            players = f"{server_info.get('num_players', '0')}/{server_info.get('max_players', '0')}"
-            widget.players_label.setText(f"{players}")
-            map_name = server_info.get('current_map', 'N/A')
-            widget.map_name_label.setText(f"{map_name}")
-            widget.update_graph()
-            widget.update_ping()
-            widget.load_map_icon()
+            widget.update_stats(stats)
+
+    def start_stream(self):
+        """Подключается к потоку обновлений, если он задан в настройках.
+
+        Пока поток активен, периодический опрос приостановлен; при разрыве
+        соединения опрос возобновляется.
+        """
+        stream_url = self.settings.get('stream_url', '')
+        if not self.streaming or not stream_url or not self.game_widgets or self.stream_thread is not None:
+            return
+        servers = list(dict.fromkeys(widget.address for widget in self.game_widgets.values()))
+
+        from stream_client import StreamWorker
+        self.stream_thread = QThread()
+        self.stream_worker = StreamWorker(stream_url, servers)
+        self.stream_worker.moveToThread(self.stream_thread)
+        self.stream_thread.started.connect(self.stream_worker.run)
+        self.stream_worker.connected.connect(self.on_stream_connected)
+        self.stream_worker.snapshot_received.connect(self.on_stream_snapshot)
+        self.stream_worker.delta_received.connect(self.on_stream_delta)
+        self.stream_worker.offline_received.connect(self.on_stream_offline)
+        self.stream_worker.disconnected.connect(self.on_stream_disconnected)
+        self.stream_worker.finished.connect(self.stream_thread.quit)
+        self.stream_worker.finished.connect(self.stream_worker.deleteLater)
+        self.stream_thread.finished.connect(lambda thread=self.stream_thread: self.on_stream_finished(thread))
+        self.stream_thread.finished.connect(self.stream_thread.deleteLater)
+        self.stream_thread.start()
+
+    def stop_stream(self):
+        """Отключается от потока обновлений."""
+        self.stream_retry_timer.stop()
+        if self.stream_thread is not None:
+            self.stream_worker.stop()
+            self.stream_thread.quit()
+            self.stream_thread.wait(2000)
+        self.stream_worker = None
+        self.stream_thread = None
+
+    def on_stream_finished(self, thread):
+        """Сбрасывает ссылки на завершившийся поток обновлений.
+
+        :param thread: Завершившийся поток.
+        """
+        if self.stream_thread is thread:
+            self.stream_worker = None
+            self.stream_thread = None
+
+    @pyqtSlot()
+    def on_stream_connected(self):
+        """Приостанавливает периодический опрос после подключения к потоку."""
+        for timer in self.update_timers.values():
+            timer.stop()
+
+    @pyqtSlot(dict)
+    def on_stream_snapshot(self, servers):
+        """Применяет полный снимок данных серверов из потока.
+
+        :param servers: Словарь {ip:port: данные сервера}.
+        """
+        for target, widget in list(self.game_widgets.items()):
+            if widget.address in servers:
+                self.apply_server_info(target, servers[widget.address])
+            else:
+                self.mark_offline(target)
+        for game_key in self.game_summaries:
+            self.update_summary_label(game_key)
+
+    @pyqtSlot(str, dict)
+    def on_stream_delta(self, address, changes):
+        """Применяет изменения данных сервера из потока.
+
+        :param address: Адрес сервера в формате ip:port.
+        :param changes: Измененные поля данных сервера.
+        """
+        for target, widget in list(self.game_widgets.items()):
+            if widget.address == address:
+                server_info = dict(widget.server_info)
+                server_info.update(changes)
+                self.apply_server_info(target, server_info)
+                self.update_summary_label(target[0])
+
+    @pyqtSlot(str)
+    def on_stream_offline(self, address):
+        """Отмечает недоступным сервер, о котором сообщил поток.
+
+        :param address: Адрес сервера в формате ip:port.
+        """
+        for target, widget in list(self.game_widgets.items()):
+            if widget.address == address:
+                self.mark_offline(target)
+                self.update_summary_label(target[0])
+
+    @pyqtSlot(str)
+    def on_stream_disconnected(self, reason):
+        """Возвращается к периодическому опросу при недоступности потока.
+
+        :param reason: Причина отключения.
+        """
+        print(f"Поток обновлений недоступен ({reason}), используется периодический опрос")
+        for timer in self.update_timers.values():
+            if not timer.isActive():
+                timer.start()
+        self.stream_retry_timer.start(STREAM_RETRY_INTERVAL)
 
     def create_tray_icon(self):
         """Создает иконку в трее и меню."""
@@ -787,6 +1533,16 @@ class MainWindow(QMainWindow):
         # Останавливаем все таймеры
         for timer in self.update_timers.values():
             timer.stop()
+        for timer in self.sample_timers.values():
+            timer.stop()
+
+        self.stop_stream()
+        if self.daemon_client is None:
+            self.stats_store.save()
+        if self.daemon is not None:
+            self.daemon.stop()
+        if self.daemon_client is not None:
+            self.daemon_client.close()
 
         # Завершаем потоки, если они есть
         for widget in self.game_widgets.values():
@@ -794,6 +1550,8 @@ class MainWindow(QMainWindow):
                 widget.ping_thread.quit()
                 widget.ping_thread.wait()
 
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
         # Удаляем иконку из трея
         self.tray_icon.hide()
         self.tray_icon.deleteLater()
@@ -830,7 +1588,11 @@ class MainWindow(QMainWindow):
         except Exception as e:
             print(f"Ошибка при сохранении настроек: {e}")
 
-        self.reload_data()
+        # Зритель просит экземпляр-источник перечитать настройки
+        if self.daemon_client is not None:
+            self.daemon_client.send({'type': 'reload'})
+        else:
+            self.reload_data()
 
     def apply_temporary_settings(self, settings):
         """Применяет временные настройки.
@@ -839,32 +1601,86 @@ class MainWindow(QMainWindow):
         """
         self.settings.update(settings)
         self.apply_transparency_settings()
-        self.resize(self.settings.get('window_width', self.width()), self.height())
+        self.apply_window_width()
 
     def restore_original_settings(self):
         """Восстанавливает оригинальные настройки."""
         self.settings = copy.deepcopy(self.original_settings)
         self.apply_transparency_settings()
-        self.resize(self.settings.get('window_width', self.width()), self.height())
+        self.apply_window_width()
+
+    def apply_window_width(self):
+        """Применяет ширину окна из настроек, если она изменилась."""
+        width = self.settings.get('window_width', self.width())
+        if width != self.width():
+            self.resize(width, self.height())
 
     def reload_data(self):
         """Перезагружает данные о серверах и обновляет интерфейс."""
+        self.stop_stream()
+        self.clear_server_widgets()
+        self.load_data()
+
+    def clear_server_widgets(self):
+        """Удаляет виджеты серверов, сводки и таймеры обновления."""
         for widget in self.game_widgets.values():
             widget.setParent(None)
-        for timer in self.update_timers.values():
+        for label in self.summary_labels.values():
+            label.setParent(None)
+        for timer in list(self.update_timers.values()) + list(self.sample_timers.values()):
             timer.stop()
         self.game_widgets.clear()
+        self.summary_labels.clear()
+        self.game_summaries.clear()
         self.update_timers.clear()
-        self.load_data()
+        self.sample_timers.clear()
+        self.server_online.clear()
 
     def resizeEvent(self, event):
         """Обрабатывает изменение размера окна."""
         super().resizeEvent(event)
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Монитор игровых серверов")
+    parser.add_argument('--record', metavar='FILE', help="Записать сетевой трафик в файл трассы")
+    parser.add_argument('--replay', metavar='FILE', help="Воспроизвести сетевой трафик из файла трассы")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Скорость воспроизведения трассы (1 — как при записи, 0 — без задержек)")
+    parser.add_argument('--startup-report', action='store_true', help="Вывести отчет о фазах запуска")
+    parser.add_argument('--standalone', action='store_true',
+                        help="Не подключаться к уже запущенному экземпляру и не раздавать ему данные")
+    args, qt_args = parser.parse_known_args()
+    startup_report = args.startup_report
+
+    if args.replay or args.record:
+        from traffic_trace import TrafficRecorder, TrafficReplayer
+
+    if args.replay:
+        replayer = TrafficReplayer(args.replay, speed=args.speed)
+        host_guard.getter = replayer.get
+        ping_host = replayer.ping
+        query_servers = replayer.query
+        if args.speed > 0:
+            time_scale = args.speed
+    elif args.record:
+        from udp_query import QueryEngine
+        recorder = TrafficRecorder(args.record, getter=host_guard.getter, pinger=ping_host,
+                                   querier=QueryEngine().query_all)
+        host_guard.getter = recorder.get
+        ping_host = recorder.ping
+        query_servers = recorder.query
+
+    startup_timer.mark("imports")
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
+    startup_timer.mark("qt_init")
 
-    window = MainWindow()
+    # Поток обновлений и другие экземпляры не проходят через трассу, поэтому при
+    # записи и воспроизведении не используются
+    tracing = bool(args.record or args.replay)
+    window = MainWindow(single_instance=not (args.standalone or tracing), streaming=not tracing)
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if args.record:
+        recorder.close()
+    sys.exit(exit_code)
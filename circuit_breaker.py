@@ -0,0 +1,159 @@
+"""Автоматические выключатели для конечных точек и бюджет времени на раунд обновления.
+
+Конечная точка — это хост (например, CDN иконок) или отдельный ресурс на
+общем хосте (например, запись сервера у агрегатора): все записи агрегатора
+обслуживает один хост, и общий выключатель сбрасывался бы успешными ответами
+по другим записям.
+
+Выключатель размыкается после нескольких неудачных запросов подряд и
+некоторое время отклоняет запросы сразу, без обращения к сети. По истечении
+паузы пропускается один пробный запрос (полуоткрытое состояние):
+успех замыкает выключатель, неудача снова размыкает его.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class CircuitOpenError(Exception):
+    """Запрос отклонен, так как выключатель конечной точки разомкнут."""
+
+
+class DeadlineExceeded(Exception):
+    """Запрос отклонен, так как бюджет времени раунда исчерпан."""
+
+
+class Deadline:
+    """Общий срок выполнения для группы запросов."""
+
+    def __init__(self, budget, clock=time.monotonic):
+        """Инициализирует срок.
+
+        :param budget: Бюджет времени в секундах.
+        :param clock: Функция текущего времени.
+        """
+        self.clock = clock
+        self.expires_at = clock() + budget
+
+    def remaining(self):
+        """Возвращает оставшееся время в секундах (не меньше нуля)."""
+        return max(0.0, self.expires_at - self.clock())
+
+
+class CircuitBreaker:
+    """Автоматический выключатель одной конечной точки."""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        """Инициализирует выключатель.
+
+        :param failure_threshold: Число неудач подряд для размыкания.
+        :param reset_timeout: Пауза перед пробным запросом, в секундах.
+        :param clock: Функция текущего времени.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Проверяет, можно ли выполнить запрос.
+
+        В полуоткрытом состоянии пропускается только один пробный запрос.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """Отмечает успешный запрос и замыкает выключатель."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Отмечает неудачный запрос и при необходимости размыкает выключатель."""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class HostGuard:
+    """Выполняет HTTP-запросы с тайм-аутом, бюджетом времени и выключателем на каждую конечную точку."""
+
+    # Минимальное время, ради которого еще имеет смысл начинать запрос, в секундах.
+    MIN_REQUEST_TIME = 0.2
+
+    def __init__(self, getter, request_timeout=5.0, failure_threshold=3, reset_timeout=30.0):
+        """Инициализирует HostGuard.
+
+        :param getter: Функция выполнения HTTP GET-запросов.
+        :param request_timeout: Тайм-аут одного запроса, в секундах.
+        :param failure_threshold: Число неудач подряд для размыкания выключателя.
+        :param reset_timeout: Пауза перед пробным запросом, в секундах.
+        """
+        self.getter = getter
+        self.request_timeout = request_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint):
+        """Возвращает выключатель конечной точки, создавая его при необходимости.
+
+        :param endpoint: Ключ конечной точки.
+        """
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[endpoint]
+
+    def get(self, url, deadline=None, endpoint=None, timeout=None, **kwargs):
+        """Выполняет HTTP GET-запрос через выключатель конечной точки.
+
+        :param url: Адрес запроса.
+        :param deadline: Общий срок раунда (Deadline) или None.
+        :param timeout: Тайм-аут запроса в секундах; по умолчанию request_timeout.
+        :param endpoint: Ключ конечной точки для выключателя; по умолчанию хост
+            из адреса. Для отдельного ресурса неудачей считается любой ответ с
+            кодом ошибки, для хоста — только ошибки сервера (5xx).
+        :return: Ответ на запрос.
+        :raises CircuitOpenError: Если выключатель конечной точки разомкнут.
+        :raises DeadlineExceeded: Если бюджет времени раунда исчерпан.
+        """
+        host = urlparse(url).netloc
+        failure_status = 400 if endpoint is not None else 500
+        endpoint = endpoint or host
+        timeout = timeout or self.request_timeout
+        if deadline is not None:
+            remaining = deadline.remaining()
+            if remaining < self.MIN_REQUEST_TIME:
+                raise DeadlineExceeded(f"Бюджет времени исчерпан, запрос к {endpoint} отменен")
+            timeout = min(timeout, remaining)
+
+        breaker = self.breaker(endpoint)
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{endpoint} временно недоступен")
+
+        try:
+            response = self.getter(url, timeout=timeout, **kwargs)
+        except Exception:
+            breaker.record_failure()
+            raise
+        if response.status_code >= failure_status:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
@@ -0,0 +1,206 @@
+"""Локальные тестовые серверы для проверки прямого опроса.
+
+Заменители игровых серверов для проверки QueryEngine без выхода в сеть: на
+каждый поддерживаемый протокол (A2S, Quake 3, GameSpy v1, GameSpy v3 и
+Minecraft Server List Ping) поднимается минимальный ответчик, отдающий
+изменяющиеся тестовые данные.
+
+Запуск:
+    python fake_game_servers.py [--host 127.0.0.1] [--protocols a2s quake3 ...]
+
+Серверы для настроек монитора (порты по умолчанию):
+    cs-1.6     127.0.0.1:27015
+    cod4       127.0.0.1:28960
+    bf1942     127.0.0.1:14567  (запросы на порт 23000)
+    bf2        127.0.0.1:16567  (запросы на порт 29900)
+    minecraft  127.0.0.1:25565
+"""
+import argparse
+import asyncio
+import json
+import random
+import struct
+
+from udp_query import _read_varint, _varint
+
+# Порт, на котором ответчик каждого протокола принимает запросы.
+DEFAULT_PORTS = {
+    'a2s': 27015,
+    'quake3': 28960,
+    'gamespy': 23000,
+    'gamespy3': 29900,
+    'minecraft': 25565,
+}
+
+MAX_PLAYERS = 32
+
+
+def fake_state(protocol):
+    """Генерирует изменяющиеся тестовые данные сервера.
+
+    :param protocol: Протокол, для которого создаются данные.
+    :return: Словарь с данными сервера.
+    """
+    return {
+        'name': f"Test {protocol} server",
+        'current_map': random.choice(['de_dust2', 'q3dm17', 'kharkov', 'strike_at_karkand']),
+        'num_players': random.randint(0, MAX_PLAYERS),
+        'max_players': MAX_PLAYERS,
+    }
+
+
+class _FakeUdpServer(asyncio.DatagramProtocol):
+    """Базовый UDP-ответчик: на каждый запрос отправляет пакеты из reply()."""
+    protocol = None
+
+    def __init__(self):
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        for packet in self.reply(data, fake_state(self.protocol)):
+            self.transport.sendto(packet, addr)
+
+    def reply(self, data, state):
+        """Возвращает список ответных пакетов на запрос.
+
+        :param data: Полученный пакет.
+        :param state: Текущие данные сервера.
+        """
+        raise NotImplementedError
+
+
+class FakeA2sServer(_FakeUdpServer):
+    """Ответчик A2S_INFO, требующий challenge, как современные серверы Source."""
+    protocol = 'a2s'
+    CHALLENGE = b'\x01\x02\x03\x04'
+
+    def reply(self, data, state):
+        if not data.startswith(b'\xFF\xFF\xFF\xFFTSource Engine Query\x00'):
+            return []
+        if not data.endswith(self.CHALLENGE):
+            return [b'\xFF\xFF\xFF\xFFA' + self.CHALLENGE]
+        return [b'\xFF\xFF\xFF\xFFI\x30'
+                + state['name'].encode('utf-8') + b'\x00'
+                + state['current_map'].encode('utf-8') + b'\x00'
+                + b'cstrike\x00Counter-Strike\x00'
+                + struct.pack('<H', 10)
+                + bytes([state['num_players'], state['max_players']])]
+
+
+class FakeQuake3Server(_FakeUdpServer):
+    """Ответчик getstatus протокола Quake 3."""
+    protocol = 'quake3'
+
+    def reply(self, data, state):
+        if not data.startswith(b'\xFF\xFF\xFF\xFFgetstatus'):
+            return []
+        rules = (f"\\sv_hostname\\^1{state['name']}\\mapname\\{state['current_map']}"
+                 f"\\sv_maxclients\\{state['max_players']}")
+        players = "".join(f'0 50 "player{i}"\n' for i in range(state['num_players']))
+        return [b'\xFF\xFF\xFF\xFFstatusResponse\n' + f"{rules}\n{players}".encode('utf-8')]
+
+
+class FakeGameSpyServer(_FakeUdpServer):
+    """Ответчик \\status\\ протокола GameSpy v1; ответ разбит на два пакета."""
+    protocol = 'gamespy'
+
+    def reply(self, data, state):
+        if data != b'\\status\\':
+            return []
+        return [f"\\hostname\\{state['name']}\\mapname\\{state['current_map']}".encode('latin-1'),
+                f"\\numplayers\\{state['num_players']}\\maxplayers\\{state['max_players']}"
+                f"\\final\\\\queryid\\1.1".encode('latin-1')]
+
+
+class FakeGameSpy3Server(_FakeUdpServer):
+    """Ответчик протокола GameSpy v3 с проверкой challenge."""
+    protocol = 'gamespy3'
+    CHALLENGE = 12345
+
+    def reply(self, data, state):
+        if len(data) < 7 or not data.startswith(b'\xFE\xFD'):
+            return []
+        session = data[3:7]
+        if data[2] == 0x09:
+            return [b'\x09' + session + str(self.CHALLENGE).encode('ascii') + b'\x00']
+        if data[2] != 0x00 or data[7:11] != struct.pack('>i', self.CHALLENGE):
+            return []
+        rules = {
+            'hostname': state['name'],
+            'mapname': state['current_map'],
+            'numplayers': state['num_players'],
+            'maxplayers': state['max_players'],
+        }
+        body = b''.join(f"{key}\x00{value}\x00".encode('utf-8') for key, value in rules.items())
+        return [b'\x00' + session + body + b'\x00']
+
+
+UDP_SERVERS = {
+    'a2s': FakeA2sServer,
+    'quake3': FakeQuake3Server,
+    'gamespy': FakeGameSpyServer,
+    'gamespy3': FakeGameSpy3Server,
+}
+
+
+async def handle_minecraft(reader, writer):
+    """Отвечает на Server List Ping протокола Minecraft."""
+    try:
+        for _ in range(2):
+            # Рукопожатие и запрос статуса
+            await reader.readexactly(await _read_varint(reader))
+        state = fake_state('minecraft')
+        status = json.dumps({
+            'description': {'text': state['name']},
+            'players': {'online': state['num_players'], 'max': state['max_players']},
+        }).encode('utf-8')
+        packet = b'\x00' + _varint(len(status)) + status
+        writer.write(_varint(len(packet)) + packet)
+        await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', protocols=None, ports=None):
+    """Запускает ответчики и обслуживает запросы до отмены.
+
+    :param host: Адрес для прослушивания.
+    :param protocols: Список протоколов; по умолчанию все.
+    :param ports: Словарь портов по протоколам; по умолчанию DEFAULT_PORTS.
+    """
+    loop = asyncio.get_running_loop()
+    ports = {**DEFAULT_PORTS, **(ports or {})}
+    transports = []
+    tcp_server = None
+    try:
+        for protocol in protocols or DEFAULT_PORTS:
+            if protocol == 'minecraft':
+                tcp_server = await asyncio.start_server(handle_minecraft, host, ports[protocol])
+            else:
+                transport, _ = await loop.create_datagram_endpoint(
+                    UDP_SERVERS[protocol], local_addr=(host, ports[protocol]))
+                transports.append(transport)
+            print(f"{protocol}: {host}:{ports[protocol]}")
+        await asyncio.Event().wait()
+    finally:
+        for transport in transports:
+            transport.close()
+        if tcp_server is not None:
+            tcp_server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Локальные тестовые серверы для прямого опроса")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--protocols', nargs='+', choices=sorted(DEFAULT_PORTS), default=None)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.protocols))
+    except KeyboardInterrupt:
+        pass
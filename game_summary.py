@@ -0,0 +1,67 @@
+"""Сводная информация по группе серверов одной игры."""
+
+
+class GameSummary:
+    """Инкрементальная сводка по серверам игры: суммарный онлайн и лучший пинг.
+
+    Сводка обновляется по одному серверу за раз: сумма игроков корректируется на
+    разницу со старым значением, а лучший пинг пересчитывается полностью только
+    когда ухудшается пинг сервера, который был лучшим.
+    """
+
+    def __init__(self):
+        """Инициализирует пустую сводку."""
+        self.players = {}
+        self.pings = {}
+        self.total_players = 0
+        self.best_ping = None
+        self.best_server = None
+
+    def update_players(self, server, num_players):
+        """Обновляет число игроков сервера.
+
+        :param server: Ключ сервера.
+        :param num_players: Число игроков.
+        """
+        try:
+            num_players = int(num_players)
+        except (TypeError, ValueError):
+            num_players = 0
+        self.total_players += num_players - self.players.get(server, 0)
+        self.players[server] = num_players
+
+    def update_ping(self, server, ping_ms):
+        """Обновляет пинг сервера.
+
+        :param server: Ключ сервера.
+        :param ping_ms: Пинг в миллисекундах или None, если сервер недоступен.
+        """
+        if ping_ms is None:
+            self.pings.pop(server, None)
+        else:
+            self.pings[server] = ping_ms
+
+        if ping_ms is not None and (self.best_ping is None or ping_ms <= self.best_ping):
+            self.best_ping = ping_ms
+            self.best_server = server
+        elif server == self.best_server:
+            self._recompute_best_ping()
+
+    def remove(self, server):
+        """Удаляет сервер из сводки.
+
+        :param server: Ключ сервера.
+        """
+        self.total_players -= self.players.pop(server, 0)
+        self.pings.pop(server, None)
+        if server == self.best_server:
+            self._recompute_best_ping()
+
+    def _recompute_best_ping(self):
+        """Находит лучший пинг среди всех серверов."""
+        if self.pings:
+            self.best_server = min(self.pings, key=self.pings.get)
+            self.best_ping = self.pings[self.best_server]
+        else:
+            self.best_server = None
+            self.best_ping = None
@@ -0,0 +1,199 @@
+"""Единственный экземпляр монитора и раздача данных по локальному сокету.
+
+Первый запущенный процесс становится источником данных: он опрашивает
+серверы, выполняет ping и ведет кэши, а по локальному сокету рассылает снимки
+подключенным окнам. Последующие процессы подключаются к нему как зрители и
+сами в сеть не обращаются.
+
+Сообщения передаются как JSON, по одному на строку:
+
+    {"type": "servers", "game_list": [...], "servers": [{"target": [game_key, ip, port], "server_info": {...}}]}
+    {"type": "server", "target": [game_key, ip, port], "server_info": {...}}
+    {"type": "ping", "target": [game_key, ip, port], "ping": 42}
+    {"type": "reload"}  (от зрителя: перечитать настройки и перезагрузить данные)
+
+Для недоступного сервера server_info равен null.
+"""
+import json
+
+from PyQt6.QtCore import QDir, QLockFile, QObject, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+SERVER_NAME = "game_server_monitor"
+# Время ожидания подключения к работающему экземпляру, в миллисекундах.
+CONNECT_TIMEOUT = 500
+# Время ожидания блокировки при захвате роли источника, в миллисекундах.
+LOCK_TIMEOUT = 3000
+
+
+def encode_message(message):
+    """Кодирует сообщение для передачи по сокету."""
+    return (json.dumps(message, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+
+
+class _LineReader:
+    """Собирает сообщения из поступающих по сокету фрагментов."""
+
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, data):
+        """Добавляет данные и возвращает полностью полученные сообщения."""
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\n")
+        messages = []
+        for line in lines:
+            try:
+                messages.append(json.loads(line.decode('utf-8')))
+            except ValueError:
+                print(f"Некорректное сообщение: {line[:100]}")
+        return messages
+
+
+def is_running():
+    """Проверяет, отвечает ли на сокете работающий экземпляр."""
+    socket = QLocalSocket()
+    socket.connectToServer(SERVER_NAME)
+    connected = socket.waitForConnected(CONNECT_TIMEOUT)
+    socket.abort()
+    return connected
+
+
+class MonitorDaemon(QObject):
+    """Источник данных, рассылающий снимки подключенным зрителям."""
+    command_received = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        """Инициализирует MonitorDaemon.
+
+        :param parent: Родительский объект.
+        """
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.on_new_connection)
+        self.clients = {}
+        self.layout_message = None
+        self.last_messages = {}
+
+    def start(self):
+        """Начинает принимать подключения.
+
+        Захват сокета выполняется под файловой блокировкой, чтобы несколько
+        одновременно запущенных процессов не открыли его параллельно. Сокет
+        удаляется, только если на нем никто не отвечает.
+
+        :return: True, если сокет удалось открыть; False, если его занял
+            другой работающий экземпляр или открыть его не удалось.
+        """
+        lock = QLockFile(QDir.temp().absoluteFilePath(f"{SERVER_NAME}.lock"))
+        if not lock.tryLock(LOCK_TIMEOUT):
+            print("Не удалось получить блокировку локального сокета")
+            return False
+        try:
+            if self.server.listen(SERVER_NAME):
+                return True
+            if is_running():
+                return False
+            # Сокет мог остаться после аварийного завершения предыдущего экземпляра
+            QLocalServer.removeServer(SERVER_NAME)
+            if self.server.listen(SERVER_NAME):
+                return True
+            print(f"Не удалось открыть локальный сокет: {self.server.errorString()}")
+            return False
+        finally:
+            lock.unlock()
+
+    def on_new_connection(self):
+        """Подключает нового зрителя и отправляет ему текущее состояние."""
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.clients[socket] = _LineReader()
+            socket.readyRead.connect(lambda s=socket: self.on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self.on_client_disconnected(s))
+            if self.layout_message is not None:
+                socket.write(encode_message(self.layout_message))
+                for message in self.last_messages.values():
+                    socket.write(encode_message(message))
+
+    def on_ready_read(self, socket):
+        """Принимает команды от зрителя."""
+        reader = self.clients.get(socket)
+        if reader is None:
+            return
+        for message in reader.feed(bytes(socket.readAll())):
+            self.command_received.emit(message)
+
+    def on_client_disconnected(self, socket):
+        """Удаляет отключившегося зрителя."""
+        self.clients.pop(socket, None)
+        socket.deleteLater()
+
+    def publish(self, message):
+        """Рассылает сообщение всем зрителям и запоминает его для новых подключений.
+
+        :param message: Словарь сообщения.
+        """
+        if message['type'] == 'servers':
+            self.layout_message = message
+            self.last_messages.clear()
+        else:
+            self.last_messages[(message['type'], tuple(message['target']))] = message
+        data = encode_message(message)
+        for socket in list(self.clients):
+            socket.write(data)
+
+    def stop(self):
+        """Закрывает сокет и отключает зрителей."""
+        for socket in list(self.clients):
+            socket.disconnectFromServer()
+        self.server.close()
+
+
+class DaemonClient(QObject):
+    """Подключение зрителя к работающему экземпляру монитора."""
+    message_received = pyqtSignal(dict)
+    disconnected = pyqtSignal()
+
+    def __init__(self, socket, parent=None):
+        """Инициализирует DaemonClient для уже подключенного сокета.
+
+        :param socket: Подключенный QLocalSocket.
+        :param parent: Родительский объект.
+        """
+        super().__init__(parent)
+        self.socket = socket
+        self.socket.setParent(self)
+        self.reader = _LineReader()
+        self.socket.readyRead.connect(self.on_ready_read)
+        self.socket.disconnected.connect(self.disconnected)
+
+    @classmethod
+    def connect_to_running(cls, parent=None):
+        """Подключается к работающему экземпляру.
+
+        :param parent: Родительский объект.
+        :return: DaemonClient или None, если экземпляр не запущен.
+        """
+        socket = QLocalSocket()
+        socket.connectToServer(SERVER_NAME)
+        if not socket.waitForConnected(CONNECT_TIMEOUT):
+            socket.deleteLater()
+            return None
+        return cls(socket, parent)
+
+    def on_ready_read(self):
+        """Передает полученные сообщения в виде сигналов."""
+        for message in self.reader.feed(bytes(self.socket.readAll())):
+            self.message_received.emit(message)
+
+    def send(self, message):
+        """Отправляет команду экземпляру-источнику.
+
+        :param message: Словарь сообщения.
+        """
+        self.socket.write(encode_message(message))
+
+    def close(self):
+        """Отключается от экземпляра-источника."""
+        self.socket.disconnected.disconnect(self.disconnected)
+        self.socket.disconnectFromServer()
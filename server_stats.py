@@ -0,0 +1,174 @@
+"""Инкрементальная статистика по серверам.
+
+Каждый новый снимок данных сервера обновляет статистику за O(1): скользящее
+среднее числа игроков, дневные пики, процент доступности и тепловую карту
+заполненности по часам недели. Состояние сохраняется между запусками в
+компактном JSON-файле.
+"""
+import json
+import os
+import time
+from collections import deque
+
+# Число последних снимков для скользящего среднего.
+ROLLING_WINDOW = 60
+# Число дней, за которые хранятся дневные пики.
+PEAK_DAYS = 14
+# Число ячеек тепловой карты: 7 дней по 24 часа.
+HOURS_PER_WEEK = 7 * 24
+
+WEEKDAY_NAMES = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+
+class ServerStats:
+    """Статистика одного сервера."""
+
+    def __init__(self):
+        """Инициализирует пустую статистику."""
+        self.window = deque(maxlen=ROLLING_WINDOW)
+        self.window_sum = 0
+        self.daily_peaks = {}
+        self.samples = 0
+        self.online_samples = 0
+        self.heatmap_sum = [0] * HOURS_PER_WEEK
+        self.heatmap_count = [0] * HOURS_PER_WEEK
+
+    def add_sample(self, num_players, online=True, timestamp=None):
+        """Добавляет снимок состояния сервера.
+
+        :param num_players: Число игроков.
+        :param online: Доступен ли сервер.
+        :param timestamp: Время снимка (Unix time); по умолчанию текущее.
+        """
+        self.samples += 1
+        if not online:
+            return
+        self.online_samples += 1
+
+        try:
+            num_players = int(num_players)
+        except (TypeError, ValueError):
+            num_players = 0
+
+        if len(self.window) == self.window.maxlen:
+            self.window_sum -= self.window[0]
+        self.window.append(num_players)
+        self.window_sum += num_players
+
+        local_time = time.localtime(timestamp)
+        day = time.strftime('%Y-%m-%d', local_time)
+        if num_players > self.daily_peaks.get(day, -1):
+            self.daily_peaks[day] = num_players
+            while len(self.daily_peaks) > PEAK_DAYS:
+                del self.daily_peaks[min(self.daily_peaks)]
+
+        cell = local_time.tm_wday * 24 + local_time.tm_hour
+        self.heatmap_sum[cell] += num_players
+        self.heatmap_count[cell] += 1
+
+    @property
+    def rolling_average(self):
+        """Скользящее среднее числа игроков или None, если данных нет."""
+        if not self.window:
+            return None
+        return self.window_sum / len(self.window)
+
+    @property
+    def uptime(self):
+        """Доля снимков, в которых сервер был доступен (0..1), или None."""
+        if not self.samples:
+            return None
+        return self.online_samples / self.samples
+
+    def today_peak(self):
+        """Возвращает пик игроков за сегодня или None."""
+        return self.daily_peaks.get(time.strftime('%Y-%m-%d'))
+
+    def heatmap(self):
+        """Возвращает среднее число игроков по часам недели.
+
+        :return: Список из 168 значений (None для часов без данных), начиная с понедельника 00:00.
+        """
+        return [total / count if count else None
+                for total, count in zip(self.heatmap_sum, self.heatmap_count)]
+
+    def busiest_hour(self):
+        """Возвращает час недели с наибольшим средним числом игроков.
+
+        :return: Кортеж (день недели 0-6, час 0-23) или None, если данных нет.
+        """
+        averages = self.heatmap()
+        cells = [cell for cell, value in enumerate(averages) if value]
+        if not cells:
+            return None
+        cell = max(cells, key=lambda c: averages[c])
+        return divmod(cell, 24)
+
+    def to_dict(self):
+        """Возвращает состояние в виде словаря для сохранения."""
+        return {
+            'window': list(self.window),
+            'peaks': self.daily_peaks,
+            'samples': self.samples,
+            'online': self.online_samples,
+            'hm_sum': self.heatmap_sum,
+            'hm_count': self.heatmap_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Восстанавливает статистику из словаря.
+
+        :param data: Словарь, полученный из to_dict().
+        """
+        stats = cls()
+        stats.window.extend(data.get('window', []))
+        stats.window_sum = sum(stats.window)
+        stats.daily_peaks = dict(data.get('peaks', {}))
+        stats.samples = data.get('samples', 0)
+        stats.online_samples = data.get('online', 0)
+        if len(data.get('hm_sum', [])) == HOURS_PER_WEEK and len(data.get('hm_count', [])) == HOURS_PER_WEEK:
+            stats.heatmap_sum = list(data['hm_sum'])
+            stats.heatmap_count = list(data['hm_count'])
+        return stats
+
+
+class StatsStore:
+    """Хранилище статистики всех серверов."""
+
+    def __init__(self, path="stats.json"):
+        """Инициализирует хранилище.
+
+        :param path: Путь к файлу состояния.
+        """
+        self.path = path
+        self.servers = {}
+
+    def get(self, key):
+        """Возвращает статистику сервера, создавая ее при необходимости.
+
+        :param key: Ключ сервера в формате game_key/ip:port.
+        """
+        if key not in self.servers:
+            self.servers[key] = ServerStats()
+        return self.servers[key]
+
+    def load(self):
+        """Загружает состояние из файла."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding='utf-8') as f:
+                data = json.load(f)
+            self.servers = {key: ServerStats.from_dict(value) for key, value in data.items()}
+        except Exception as e:
+            print(f"Ошибка при загрузке статистики: {e}")
+
+    def save(self):
+        """Сохраняет состояние в файл."""
+        try:
+            with open(self.path, "w", encoding='utf-8') as f:
+                json.dump({key: stats.to_dict() for key, stats in self.servers.items()},
+                          f, ensure_ascii=False, separators=(',', ':'))
+        except Exception as e:
+            print(f"Ошибка при сохранении статистики: {e}")
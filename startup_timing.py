@@ -0,0 +1,53 @@
+"""Замер фаз запуска приложения.
+
+Модуль следует импортировать первым: момент его импорта считается началом
+запуска. Отчет выводится при первой отрисовке главного окна.
+"""
+import time
+
+# Целевое время до первой отрисовки окна, в секундах.
+FIRST_PAINT_TARGET = 1.0
+
+
+class StartupTimer:
+    """Собирает отметки времени фаз запуска."""
+
+    def __init__(self):
+        """Инициализирует таймер; отсчет начинается с момента создания."""
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        """Отмечает завершение фазы запуска.
+
+        :param phase: Название фазы.
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self, verbose=False):
+        """Выводит отчет о фазах запуска (однократно).
+
+        Отчет выводится, если запрошен явно или если превышено целевое время
+        до первой отрисовки.
+
+        :param verbose: Выводить отчет независимо от результата.
+        """
+        if self.reported:
+            return
+        self.reported = True
+        total = self.last - self.started
+        if not verbose and total <= FIRST_PAINT_TARGET:
+            return
+        print("Фазы запуска:")
+        for phase, duration in self.phases:
+            print(f"  {phase:<20} {duration * 1000:8.1f} ms")
+        print(f"  {'итого':<20} {total * 1000:8.1f} ms (цель {FIRST_PAINT_TARGET * 1000:.0f} ms)")
+        if total > FIRST_PAINT_TARGET:
+            print("Превышено целевое время до первой отрисовки")
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,155 @@
+"""Клиент потоковых обновлений (Server-Sent Events).
+
+Клиент держит одно долгоживущее соединение и получает изменения по серверам
+по мере их появления. Формат событий:
+
+    event: snapshot
+    data: {"servers": {"ip:port": {...данные сервера...}}}
+
+    event: delta
+    data: {"address": "ip:port", "changes": {...измененные поля...}}
+
+    event: offline
+    data: {"address": "ip:port"}  (сервер перестал отвечать; после восстановления
+                                   приходит delta со всеми полями)
+"""
+import json
+import socket
+
+import requests
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class StreamWorker(QObject):
+    """Рабочий поток, читающий поток событий с сервера."""
+    connected = pyqtSignal()
+    snapshot_received = pyqtSignal(dict)
+    delta_received = pyqtSignal(str, dict)
+    offline_received = pyqtSignal(str)
+    disconnected = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, url, servers):
+        """Инициализирует StreamWorker.
+
+        :param url: Адрес потока событий.
+        :param servers: Список адресов серверов в формате ip:port для подписки.
+        """
+        super().__init__()
+        self.url = url
+        self.servers = servers
+        self.response = None
+        self.socket = None
+        self.stopped = False
+
+    def run(self):
+        """Подключается к потоку и передает события до разрыва соединения."""
+        reason = self.listen()
+        if reason and not self.stopped:
+            self.disconnected.emit(reason)
+        self.finished.emit()
+
+    def listen(self):
+        """Читает поток событий.
+
+        :return: Причина завершения соединения.
+        """
+        try:
+            self.response = requests.get(
+                self.url,
+                params={'servers': ",".join(self.servers)},
+                # Сжатие отключено: сжатый поток нельзя читать построчно без буферизации
+                headers={'Accept': 'text/event-stream', 'Accept-Encoding': 'identity'},
+                stream=True,
+                timeout=(5, 120),
+            )
+            self.socket = response_socket(self.response)
+            if self.stopped:
+                return None
+            if self.response.status_code != 200:
+                return f"статус {self.response.status_code}"
+            if not self.response.headers.get('Content-Type', '').startswith('text/event-stream'):
+                return "сервер не поддерживает потоковые обновления"
+            self.connected.emit()
+            self.read_events(self.read_lines())
+            return "соединение закрыто"
+        except Exception as e:
+            return str(e)
+        finally:
+            if self.response is not None:
+                self.response.close()
+
+    def read_lines(self):
+        """Читает строки потока по мере поступления.
+
+        iter_lines() буферизует данные блоками и задерживает события, пока
+        блок не заполнится, поэтому строки читаются напрямую из ответа.
+        """
+        while not self.stopped:
+            line = self.response.raw.readline()
+            if not line:
+                return
+            yield line.decode('utf-8', errors='replace').rstrip('\r\n')
+
+    def read_events(self, lines):
+        """Разбирает строки потока на события SSE.
+
+        :param lines: Итератор строк потока.
+        """
+        event = 'message'
+        data = []
+        for line in lines:
+            if self.stopped:
+                return
+            if line is None:
+                continue
+            if not line:
+                if data:
+                    self.dispatch(event, "\n".join(data))
+                event = 'message'
+                data = []
+            elif line.startswith(':'):
+                continue
+            elif line.startswith('event:'):
+                event = line[6:].strip()
+            elif line.startswith('data:'):
+                data.append(line[5:].lstrip())
+
+    def dispatch(self, event, data):
+        """Передает разобранное событие в виде сигнала.
+
+        :param event: Тип события.
+        :param data: Данные события (JSON).
+        """
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            print(f"Некорректные данные события {event}: {data[:100]}")
+            return
+        if event == 'snapshot':
+            self.snapshot_received.emit(payload.get('servers', {}))
+        elif event == 'delta':
+            self.delta_received.emit(payload.get('address', ''), payload.get('changes', {}))
+        elif event == 'offline':
+            self.offline_received.emit(payload.get('address', ''))
+
+    def stop(self):
+        """Останавливает чтение потока.
+
+        Может вызываться из другого потока: закрытие сокета прерывает
+        ожидание данных в read_lines().
+        """
+        self.stopped = True
+        if self.socket is not None:
+            try:
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        elif self.response is not None:
+            self.response.close()
+
+
+def response_socket(response):
+    """Возвращает сокет потокового ответа requests или None, если он недоступен."""
+    fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+    return getattr(getattr(fp, 'raw', None), '_sock', None)
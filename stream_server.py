@@ -0,0 +1,153 @@
+"""Локальный сервер потоковых обновлений (Server-Sent Events).
+
+Заменитель серверной стороны потокового транспорта для проверки клиента:
+опрашивает агрегатор (или генерирует тестовые данные) и отправляет подписанным
+клиентам только изменения по серверам.
+
+Запуск:
+    python stream_server.py --port 8765 [--source fake] [--interval 5]
+
+Адрес потока для настроек монитора: http://127.0.0.1:8765/stream
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+
+def aggregator_source(address):
+    """Возвращает данные сервера от агрегатора.
+
+    :param address: Адрес сервера в формате ip:port.
+    :return: Словарь с данными сервера или None.
+    """
+    ip = address.split(':')[0]
+    try:
+        response = requests.get(f"http://gamestates.ru:8000/{ip}", timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"Ошибка при получении данных сервера {address}: {e}")
+        return None
+
+
+def fake_source(address):
+    """Генерирует изменяющиеся тестовые данные сервера.
+
+    :param address: Адрес сервера в формате ip:port.
+    :return: Словарь с данными сервера.
+    """
+    return {
+        'name': f"Test server {address}",
+        'address': address.split(':')[0],
+        'current_map': random.choice(['de_dust2', 'de_inferno', 'cs_italy']),
+        'num_players': random.randint(0, 32),
+        'max_players': 32,
+    }
+
+
+SOURCES = {
+    'aggregator': aggregator_source,
+    'fake': fake_source,
+}
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """Обработчик подписки на поток изменений."""
+    source = staticmethod(aggregator_source)
+    interval = 5.0
+
+    def do_GET(self):
+        """Отдает поток событий по адресу /stream."""
+        url = urlparse(self.path)
+        if url.path != '/stream':
+            self.send_error(404)
+            return
+        servers = [server for server in parse_qs(url.query).get('servers', [''])[0].split(',') if server]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        last_sent = {}
+        try:
+            snapshot = {}
+            for address in servers:
+                server_info = self.source(address)
+                if server_info is not None:
+                    snapshot[address] = server_info
+                    last_sent[address] = server_info
+            self.send_event('snapshot', {'servers': snapshot})
+
+            while True:
+                time.sleep(self.interval)
+                for address in servers:
+                    server_info = self.source(address)
+                    if server_info is None:
+                        # После восстановления сервер придет в delta целиком
+                        if last_sent.pop(address, None) is not None:
+                            self.send_event('offline', {'address': address})
+                        continue
+                    previous = last_sent.get(address, {})
+                    changes = {key: value for key, value in server_info.items() if previous.get(key) != value}
+                    if changes:
+                        self.send_event('delta', {'address': address, 'changes': changes})
+                        last_sent[address] = server_info
+                # Комментарий-пульс позволяет обнаружить отключившегося клиента
+                self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_event(self, event, payload):
+        """Отправляет одно событие клиенту.
+
+        :param event: Тип события.
+        :param payload: Данные события.
+        """
+        data = json.dumps(payload, ensure_ascii=False)
+        self.wfile.write(f"event: {event}\ndata: {data}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        """Подавляет построчный журнал запросов."""
+        pass
+
+
+def make_server(host='127.0.0.1', port=8765, source='aggregator', interval=5.0):
+    """Создает сервер потоковых обновлений.
+
+    :param host: Адрес для прослушивания.
+    :param port: Порт для прослушивания.
+    :param source: Источник данных: 'aggregator' или 'fake'.
+    :param interval: Период опроса источника, в секундах.
+    :return: Экземпляр ThreadingHTTPServer.
+    """
+    handler = type('ConfiguredStreamHandler', (StreamHandler,), {
+        'source': staticmethod(SOURCES[source]),
+        'interval': interval,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Локальный сервер потоковых обновлений")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--source', choices=sorted(SOURCES), default='aggregator')
+    parser.add_argument('--interval', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.source, args.interval)
+    print(f"Поток обновлений: http://{args.host}:{args.port}/stream")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,230 @@
+"""Запись и воспроизведение сетевого трафика монитора.
+
+Режим записи сохраняет каждый HTTP-ответ агрегатора и CDN (а также результаты
+ping и прямого опроса серверов) вместе с временем выполнения в сжатый файл
+трассы. Режим воспроизведения
+отдает эти ответы вместо сети с исходной или ускоренной скоростью, что
+позволяет повторять исследования производительности офлайн.
+
+Формат трассы: gzip-файл, по одной JSON-записи на строку.
+"""
+import base64
+import gzip
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+
+
+def query_url(target):
+    """Возвращает адрес записи трассы для прямого опроса сервера.
+
+    :param target: Кортеж (game_key, ip, port).
+    """
+    game_key, ip, port = target
+    return f"udp://{game_key}/{ip}:{port}"
+
+
+class TracedResponse:
+    """Ответ, восстановленный из трассы (подмножество интерфейса requests.Response)."""
+
+    def __init__(self, url, status_code, content_type, content):
+        """Инициализирует ответ.
+
+        :param url: Адрес запроса.
+        :param status_code: HTTP-статус ответа.
+        :param content_type: Значение заголовка Content-Type.
+        :param content: Тело ответа в байтах.
+        """
+        self.url = url
+        self.status_code = status_code
+        self.headers = {"Content-Type": content_type} if content_type else {}
+        self.content = content
+
+    @property
+    def text(self):
+        """Возвращает тело ответа как строку."""
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        """Разбирает тело ответа как JSON."""
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        """Выбрасывает исключение для ответов с кодом ошибки, как requests."""
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} для {self.url}", response=self)
+
+
+class TrafficRecorder:
+    """Проксирует сетевые вызовы и записывает их результаты в файл трассы."""
+
+    def __init__(self, path, getter=requests.get, pinger=None, querier=None):
+        """Инициализирует запись трассы.
+
+        :param path: Путь к файлу трассы.
+        :param getter: Функция выполнения HTTP GET-запросов.
+        :param pinger: Функция выполнения ping-запросов.
+        :param querier: Функция прямого опроса серверов (QueryEngine.query_all).
+        """
+        self.path = path
+        self.getter = getter
+        self.pinger = pinger
+        self.querier = querier
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+
+    def _write(self, entry):
+        """Добавляет запись в файл трассы."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self._file.flush()
+
+    def get(self, url, **kwargs):
+        """Выполняет HTTP GET-запрос и записывает ответ.
+
+        :param url: Адрес запроса.
+        :return: Ответ requests.Response.
+        """
+        start = time.monotonic()
+        entry = {'t': round(start - self.started, 4), 'url': url}
+        try:
+            response = self.getter(url, **kwargs)
+        except Exception as e:
+            entry['dt'] = round(time.monotonic() - start, 4)
+            entry['error'] = str(e)
+            self._write(entry)
+            raise
+        entry['dt'] = round(time.monotonic() - start, 4)
+        entry['status'] = response.status_code
+        entry['ct'] = response.headers.get('Content-Type', '')
+        entry['body'] = base64.b64encode(response.content).decode('ascii')
+        self._write(entry)
+        return response
+
+    def ping(self, address, **kwargs):
+        """Выполняет ping-запрос и записывает результат.
+
+        :param address: Адрес для ping-запроса.
+        :return: Время ответа в секундах или None/False при неудаче.
+        """
+        start = time.monotonic()
+        entry = {'t': round(start - self.started, 4), 'url': f"ping://{address}"}
+        try:
+            result = self.pinger(address, **kwargs)
+        except Exception as e:
+            entry['dt'] = round(time.monotonic() - start, 4)
+            entry['error'] = str(e)
+            self._write(entry)
+            raise
+        entry['dt'] = round(time.monotonic() - start, 4)
+        entry['value'] = result
+        self._write(entry)
+        return result
+
+    def query(self, targets, **kwargs):
+        """Опрашивает серверы напрямую и записывает результат по каждому серверу.
+
+        :param targets: Список кортежей (game_key, ip, port).
+        :return: Словарь {(game_key, ip, port): данные сервера или None}.
+        """
+        start = time.monotonic()
+        results = self.querier(targets, **kwargs)
+        dt = round(time.monotonic() - start, 4)
+        for target, result in results.items():
+            self._write({'t': round(start - self.started, 4), 'url': query_url(target),
+                         'dt': dt, 'value': result})
+        return results
+
+    def close(self):
+        """Закрывает файл трассы."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TrafficReplayer:
+    """Отдает ответы из файла трассы вместо обращения к сети."""
+
+    def __init__(self, path, speed=1.0):
+        """Загружает трассу.
+
+        :param path: Путь к файлу трассы.
+        :param speed: Множитель скорости: 1 — как при записи, 0 — без задержек.
+        """
+        self.path = path
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._entries = defaultdict(deque)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._entries[entry['url']].append(entry)
+
+    def _next_entry(self, url):
+        """Возвращает следующую запись для адреса.
+
+        Записи отдаются в порядке записи; последняя запись повторяется, если
+        приложение запрашивает адрес чаще, чем при записи.
+        """
+        with self._lock:
+            queue = self._entries.get(url)
+            if not queue:
+                return None
+            if len(queue) > 1:
+                return queue.popleft()
+            return queue[0]
+
+    def _delay(self, entry):
+        """Воспроизводит записанное время выполнения запроса."""
+        if self.speed > 0:
+            time.sleep(entry.get('dt', 0) / self.speed)
+
+    def get(self, url, **kwargs):
+        """Возвращает записанный ответ на HTTP GET-запрос.
+
+        :param url: Адрес запроса.
+        :return: Объект TracedResponse.
+        """
+        entry = self._next_entry(url)
+        if entry is None:
+            raise requests.ConnectionError(f"В трассе нет записи для {url}")
+        self._delay(entry)
+        if 'error' in entry:
+            raise requests.RequestException(entry['error'])
+        return TracedResponse(url, entry['status'], entry.get('ct', ''), base64.b64decode(entry['body']))
+
+    def ping(self, address, **kwargs):
+        """Возвращает записанный результат ping-запроса.
+
+        :param address: Адрес для ping-запроса.
+        :return: Время ответа в секундах или None при неудаче.
+        """
+        entry = self._next_entry(f"ping://{address}")
+        if entry is None:
+            return None
+        self._delay(entry)
+        return entry.get('value')
+
+    def query(self, targets, **kwargs):
+        """Возвращает записанные результаты прямого опроса серверов.
+
+        Серверы опрашивались одним пакетом, поэтому воспроизводится самое долгое
+        из записанных времен опроса.
+
+        :param targets: Список кортежей (game_key, ip, port).
+        :return: Словарь {(game_key, ip, port): данные сервера или None}.
+        """
+        entries = {target: self._next_entry(query_url(target)) for target in targets}
+        recorded = [entry for entry in entries.values() if entry is not None]
+        if recorded:
+            self._delay(max(recorded, key=lambda entry: entry.get('dt', 0)))
+        return {target: entry.get('value') if entry else None for target, entry in entries.items()}
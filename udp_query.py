@@ -0,0 +1,441 @@
+"""Прямой опрос игровых серверов по их собственным протоколам.
+
+Все UDP-запросы выполняются конкурентно через один сокет в цикле asyncio;
+Minecraft опрашивается по TCP (Server List Ping) в том же цикле. Для игр без
+поддерживаемого протокола или при отсутствии ответа вызывающий код должен
+использовать данные агрегатора.
+"""
+import asyncio
+import json
+import os
+import re
+import socket
+import struct
+import time
+from collections import Counter
+
+# Протокол опроса для каждой игры.
+GAME_PROTOCOLS = {
+    'cs-1.6': 'a2s',
+    'cs-source': 'a2s',
+    'hl': 'a2s',
+    'q3-cpma': 'quake3',
+    'q3-osp': 'quake3',
+    'cod2': 'quake3',
+    'cod4': 'quake3',
+    'bf1942': 'gamespy',
+    'bf1942-rtr': 'gamespy',
+    'bf1942-tl': 'gamespy',
+    'bfvietnam': 'gamespy',
+    'ut': 'gamespy',
+    'bf2': 'gamespy3',
+    'bf2142': 'gamespy3',
+    'minecraft': 'minecraft',
+}
+
+# Фиксированные порты запросов для игр, у которых он отличается от игрового.
+QUERY_PORTS = {
+    'bf1942': 23000,
+    'bf1942-rtr': 23000,
+    'bf1942-tl': 23000,
+    'bfvietnam': 23000,
+    'bf2': 29900,
+    'bf2142': 29900,
+}
+
+# Смещение порта запросов относительно игрового порта.
+QUERY_PORT_OFFSETS = {
+    'ut': 1,
+}
+
+# Максимальное число точек истории игроков, накапливаемых при прямом опросе.
+MAX_HISTORY_POINTS = 288
+
+_QUAKE_COLOR_RE = re.compile(r'\^.')
+
+
+def query_port(game_key, port):
+    """Возвращает порт запросов для игры по умолчанию.
+
+    :param game_key: Ключ игры.
+    :param port: Игровой порт сервера.
+    :return: Порт, на который отправляются запросы статуса.
+    """
+    if game_key in QUERY_PORTS:
+        return QUERY_PORTS[game_key]
+    return int(port) + QUERY_PORT_OFFSETS.get(game_key, 0)
+
+
+def merge_server_info(server_info, result):
+    """Накладывает результат прямого опроса на данные сервера.
+
+    История игроков (players_detailed) дополняется новой точкой, так как прямой
+    опрос возвращает только текущее состояние.
+
+    :param server_info: Предыдущие данные сервера (может быть None).
+    :param result: Результат прямого опроса.
+    :return: Новый словарь данных сервера.
+    """
+    merged = dict(server_info or {})
+    merged.update(result)
+    history = dict(merged.get('players_detailed') or {})
+    history[time.strftime('%H:%M:%S')] = result.get('num_players', 0)
+    while len(history) > MAX_HISTORY_POINTS:
+        del history[next(iter(history))]
+    merged['players_detailed'] = history
+    return merged
+
+
+def _read_cstring(data, offset):
+    """Читает строку, завершенную нулевым байтом.
+
+    :return: Кортеж (строка, смещение после строки).
+    """
+    end = data.index(b'\x00', offset)
+    return data[offset:end].decode('utf-8', errors='replace'), end + 1
+
+
+class _UdpQuery:
+    """Базовый класс запроса статуса по UDP."""
+
+    def __init__(self):
+        """Инициализирует запрос."""
+        self.result = None
+
+    def first_packet(self):
+        """Возвращает первый пакет запроса."""
+        raise NotImplementedError
+
+    def handle(self, data):
+        """Обрабатывает ответный пакет.
+
+        При получении полного ответа заполняет self.result.
+
+        :param data: Полученный пакет.
+        :return: Следующий пакет для отправки или None.
+        """
+        raise NotImplementedError
+
+
+class A2sQuery(_UdpQuery):
+    """Запрос A2S_INFO (Half-Life, Counter-Strike, Source)."""
+
+    REQUEST = b'\xFF\xFF\xFF\xFFTSource Engine Query\x00'
+
+    def first_packet(self):
+        return self.REQUEST
+
+    def handle(self, data):
+        if not data.startswith(b'\xFF\xFF\xFF\xFF') or len(data) < 5:
+            return None
+        kind = data[4]
+        if kind == 0x41:
+            # Сервер требует challenge: повторяем запрос с ним
+            return self.REQUEST + data[5:9]
+        if kind == 0x49:
+            offset = 6
+            name, offset = _read_cstring(data, offset)
+            current_map, offset = _read_cstring(data, offset)
+            _, offset = _read_cstring(data, offset)
+            _, offset = _read_cstring(data, offset)
+            offset += 2
+            num_players, max_players = data[offset], data[offset + 1]
+        elif kind == 0x6D:
+            offset = 5
+            _, offset = _read_cstring(data, offset)
+            name, offset = _read_cstring(data, offset)
+            current_map, offset = _read_cstring(data, offset)
+            _, offset = _read_cstring(data, offset)
+            _, offset = _read_cstring(data, offset)
+            num_players, max_players = data[offset], data[offset + 1]
+        else:
+            return None
+        self.result = {
+            'name': name,
+            'current_map': current_map,
+            'num_players': num_players,
+            'max_players': max_players,
+        }
+        return None
+
+
+class Quake3Query(_UdpQuery):
+    """Запрос getstatus (Quake 3 и Call of Duty)."""
+
+    def first_packet(self):
+        return b'\xFF\xFF\xFF\xFFgetstatus\n'
+
+    def handle(self, data):
+        prefix = b'\xFF\xFF\xFF\xFFstatusResponse\n'
+        if not data.startswith(prefix):
+            return None
+        lines = data[len(prefix):].decode('utf-8', errors='replace').split('\n')
+        parts = lines[0].split('\\')[1:]
+        rules = dict(zip(parts[0::2], parts[1::2]))
+        players = [line for line in lines[1:] if line.strip()]
+        self.result = {
+            'name': _QUAKE_COLOR_RE.sub('', rules.get('sv_hostname', '')),
+            'current_map': rules.get('mapname', ''),
+            'num_players': len(players),
+            'max_players': int(rules.get('sv_maxclients', 0) or 0),
+        }
+        return None
+
+
+class GameSpyQuery(_UdpQuery):
+    """Запрос \\status\\ протокола GameSpy v1 (Battlefield 1942, Unreal Tournament)."""
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = b''
+
+    def first_packet(self):
+        return b'\\status\\'
+
+    def handle(self, data):
+        self.buffer += data
+        if b'\\final\\' not in self.buffer:
+            return None
+        parts = self.buffer.decode('latin-1').split('\\')[1:]
+        rules = dict(zip(parts[0::2], parts[1::2]))
+        self.result = {
+            'name': rules.get('hostname', ''),
+            'current_map': rules.get('mapname', ''),
+            'num_players': int(rules.get('numplayers', 0) or 0),
+            'max_players': int(rules.get('maxplayers', 0) or 0),
+        }
+        return None
+
+
+class GameSpy3Query(_UdpQuery):
+    """Запрос протокола GameSpy v3 (Battlefield 2, Battlefield 2142)."""
+
+    def __init__(self):
+        super().__init__()
+        self.session = os.urandom(4)
+
+    def first_packet(self):
+        return b'\xFE\xFD\x09' + self.session
+
+    def handle(self, data):
+        if len(data) < 5 or data[1:5] != self.session:
+            return None
+        if data[0] == 0x09:
+            challenge, _ = _read_cstring(data, 5)
+            return (b'\xFE\xFD\x00' + self.session
+                    + struct.pack('>i', int(challenge or 0)) + b'\xFF\xFF\xFF')
+        if data[0] != 0x00:
+            return None
+        rules = {}
+        offset = 5
+        while offset < len(data):
+            key, offset = _read_cstring(data, offset)
+            if not key:
+                break
+            rules[key], offset = _read_cstring(data, offset)
+        self.result = {
+            'name': rules.get('hostname', ''),
+            'current_map': rules.get('mapname', ''),
+            'num_players': int(rules.get('numplayers', 0) or 0),
+            'max_players': int(rules.get('maxplayers', 0) or 0),
+        }
+        return None
+
+
+UDP_QUERIES = {
+    'a2s': A2sQuery,
+    'quake3': Quake3Query,
+    'gamespy': GameSpyQuery,
+    'gamespy3': GameSpy3Query,
+}
+
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    """Общий UDP-сокет, распределяющий ответы по активным запросам."""
+
+    def __init__(self):
+        self.transport = None
+        self.pending = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        entry = self.pending.get(addr[:2])
+        if entry is None:
+            return
+        query, future = entry
+        if future.done():
+            return
+        try:
+            reply = query.handle(data)
+        except (ValueError, IndexError, struct.error):
+            return
+        if query.result is not None:
+            future.set_result(query.result)
+        elif reply:
+            self.transport.sendto(reply, addr[:2])
+
+    def error_received(self, exc):
+        pass
+
+
+def _varint(value):
+    """Кодирует число в формате VarInt протокола Minecraft."""
+    out = b''
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out += bytes([byte | 0x80])
+        else:
+            return out + bytes([byte])
+
+
+async def _read_varint(reader):
+    """Читает число в формате VarInt из потока."""
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value
+    raise ValueError("Слишком длинный VarInt")
+
+
+def _minecraft_description(description):
+    """Извлекает текст из поля description ответа Minecraft."""
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        text = description.get('text', '')
+        for extra in description.get('extra', []):
+            text += _minecraft_description(extra)
+        return text
+    return ''
+
+
+class QueryEngine:
+    """Конкурентный опрос серверов напрямую по их протоколам."""
+
+    def __init__(self, timeout=1.5, retries=1):
+        """Инициализирует движок опроса.
+
+        :param timeout: Время ожидания ответа на одну попытку, в секундах.
+        :param retries: Число повторных отправок запроса при отсутствии ответа.
+        """
+        self.timeout = timeout
+        self.retries = retries
+
+    @staticmethod
+    def supports(game_key):
+        """Проверяет, поддерживается ли прямой опрос для игры."""
+        return game_key in GAME_PROTOCOLS
+
+    def query_all(self, targets, budget=None, query_ports=None):
+        """Синхронно опрашивает список серверов.
+
+        :param targets: Список кортежей (game_key, ip, port).
+        :param budget: Максимальное общее время опроса в секундах или None.
+        :param query_ports: Словарь {(game_key, ip, port): порт запросов} для
+            серверов с нестандартным портом запросов.
+        :return: Словарь {(game_key, ip, port): данные сервера или None}.
+        """
+        return asyncio.run(self.query_all_async(targets, budget, query_ports))
+
+    async def query_all_async(self, targets, budget=None, query_ports=None):
+        """Опрашивает список серверов конкурентно.
+
+        :param targets: Список кортежей (game_key, ip, port).
+        :param budget: Максимальное общее время опроса в секундах или None.
+        :param query_ports: Словарь {(game_key, ip, port): порт запросов} или None.
+        :return: Словарь {(game_key, ip, port): данные сервера или None}.
+        """
+        timeout = self.timeout
+        if budget is not None:
+            timeout = min(timeout, budget / (self.retries + 1))
+        results = {target: None for target in targets}
+        udp_targets = []
+        tcp_tasks = {}
+        for target in results:
+            protocol = GAME_PROTOCOLS.get(target[0])
+            if protocol == 'minecraft':
+                tcp_tasks[target] = self._query_minecraft(target[1], int(target[2]), timeout)
+            elif protocol in UDP_QUERIES:
+                udp_targets.append(target)
+
+        udp_task = self._query_udp(udp_targets, timeout, query_ports or {}) if udp_targets else None
+        gathered = await asyncio.gather(*tcp_tasks.values(), *([udp_task] if udp_task else []),
+                                        return_exceptions=True)
+        for target, result in zip(tcp_tasks, gathered):
+            if isinstance(result, dict):
+                results[target] = result
+        if udp_task and isinstance(gathered[-1], dict):
+            results.update(gathered[-1])
+        return results
+
+    async def _query_udp(self, targets, timeout, query_ports):
+        """Опрашивает UDP-серверы через один общий сокет.
+
+        Если у нескольких серверов совпадает адрес запросов (например, серверы
+        bf1942 на одном хосте без указанного порта запросов), ответ нельзя
+        отнести к одному из них, и такие серверы не опрашиваются.
+        """
+        addrs = {target: (target[1], query_ports.get(target) or query_port(target[0], target[2]))
+                 for target in targets}
+        shared = Counter(addrs.values())
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(
+            _QueryProtocol, local_addr=('0.0.0.0', 0), family=socket.AF_INET)
+        try:
+            futures = {}
+            for target, addr in addrs.items():
+                if shared[addr] > 1:
+                    continue
+                query = UDP_QUERIES[GAME_PROTOCOLS[target[0]]]()
+                protocol.pending[addr] = (query, loop.create_future())
+                futures[target] = protocol.pending[addr][1]
+
+            for attempt in range(self.retries + 1):
+                waiting = [(addr, query) for addr, (query, future) in protocol.pending.items()
+                           if not future.done()]
+                if not waiting:
+                    break
+                for addr, query in waiting:
+                    transport.sendto(query.first_packet(), addr)
+                await asyncio.wait([protocol.pending[addr][1] for addr, _ in waiting],
+                                   timeout=timeout)
+
+            return {target: futures[target].result() if target in futures and futures[target].done() else None
+                    for target in targets}
+        finally:
+            transport.close()
+
+    async def _query_minecraft(self, host, port, timeout):
+        """Опрашивает сервер Minecraft по протоколу Server List Ping."""
+        async def ping():
+            reader, writer = await asyncio.open_connection(host, port)
+            try:
+                host_bytes = host.encode('utf-8')
+                handshake = (b'\x00' + _varint(47) + _varint(len(host_bytes)) + host_bytes
+                             + struct.pack('>H', port) + _varint(1))
+                writer.write(_varint(len(handshake)) + handshake)
+                writer.write(_varint(1) + b'\x00')
+                await writer.drain()
+                await _read_varint(reader)
+                await _read_varint(reader)
+                length = await _read_varint(reader)
+                status = json.loads((await reader.readexactly(length)).decode('utf-8'))
+            finally:
+                writer.close()
+            players = status.get('players', {})
+            return {
+                'name': _minecraft_description(status.get('description', '')),
+                'num_players': players.get('online', 0),
+                'max_players': players.get('max', 0),
+            }
+
+        try:
+            return await asyncio.wait_for(ping(), timeout * (self.retries + 1))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            return None